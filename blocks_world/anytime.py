@@ -0,0 +1,134 @@
+import heapq
+
+from blocks_world.graph import successors, apply_move
+from blocks_world.heuristic_search import heuristic_delta
+from blocks_world.instrumentation import instrument, next_report
+from blocks_world.utils import reconstruct_path, TimeoutException
+
+GREEDY = float("inf")  # Weight of a pure best-first iteration
+DEFAULT_WEIGHTS = (GREEDY, 5, 3, 2, 1.5, 1.25, 1)
+
+
+def anytime_search(initial_state, goal_state, heuristic, weights=DEFAULT_WEIGHTS, on_improvement=None,
+                   initial_plan=None, stats=None, deadline=None):
+    """
+    Anytime Repairing A* (ARA*): weighted A* with a decreasing weight that reuses its search effort.
+    Each iteration orders the frontier by g + w * h. States improved after being expanded in the current
+    iteration are set aside and merged back into the frontier, re-keyed with the next weight, instead of
+    restarting from scratch. With an admissible heuristic every plan costs at most w times the optimum,
+    and the plan of the last iteration (w = 1) is optimal. A GREEDY weight orders the frontier by h alone,
+    preferring deeper states on ties, and stops at its first plan shorter than the incumbent (if any): this
+    crosses the large heuristic plateaus of Blocks World much faster than any finite weight and gives an
+    early first plan, or an early improvement on the initial plan.
+    When the deadline expires, the best plan found so far is returned instead of throwing the work away.
+    :param initial_state: Initial PackedState.
+    :param goal_state: Goal PackedState.
+    :param heuristic: Heuristic function to guide the search (admissible for the suboptimality bound).
+    :param weights: Decreasing heuristic weights (or GREEDY), one per iteration.
+    :param on_improvement: Optional callback called with (plan, weight) whenever a better plan is found.
+    :param initial_plan: Optional known plan (e.g. from towers.tower_plan) used as the first incumbent.
+    :param stats: Optional SearchStats object collecting counters and timings.
+    :param deadline: Optional Deadline checked once per expansion.
+    :return: Solution path (best found) and nodes explored.
+    """
+    expand, materialise, heuristic, delta = instrument(stats, successors, apply_move, heuristic,
+                                                       heuristic_delta(heuristic))
+    h_values = {initial_state: heuristic(initial_state, goal_state)}
+    best_cost = {initial_state: 0}  # Cheapest known path cost (g) of each generated state
+    prev = {initial_state: None}  # Track predecessors
+    moves = {initial_state: None}  # Track moves
+    frontier = []
+    inconsistent = set()  # States improved after their expansion in the current iteration
+    closed = set()
+    incumbent = initial_plan  # Best plan found so far
+    incumbent_cost = len(initial_plan) if initial_plan is not None else None
+    nodes_explored = generated = duplicates = reopened = 0
+    report_at = next_report(stats)
+
+    if initial_state == goal_state:
+        return [], 1
+
+    inconsistent.add(initial_state)
+    try:
+        for weight in weights:
+            # Merge the set-aside states back and re-key the frontier for the new weight
+            pending = {state for _, _, cost, state in frontier if cost == best_cost[state]} | inconsistent
+            frontier = [_entry(weight, best_cost[state], h_values[state], state) for state in pending]
+            heapq.heapify(frontier)
+            inconsistent = set()
+            closed = set()
+            improved = False  # Whether this iteration found a better plan
+
+            while frontier:
+                f, _, cost, current_state = frontier[0]
+                if weight == GREEDY:
+                    if improved:
+                        break  # The greedy iteration only looks for one better plan
+                elif incumbent_cost is not None and incumbent_cost <= f:
+                    break  # No state in the frontier can lead to a better plan at this weight
+                heapq.heappop(frontier)
+
+                # Skip entries superseded by a cheaper path, and states already expanded in this iteration
+                if cost > best_cost[current_state] or current_state in closed:
+                    continue
+                closed.add(current_state)
+                nodes_explored += 1
+                if nodes_explored == report_at:
+                    stats.record(nodes_explored, generated, duplicates, len(frontier), len(best_cost), reopened)
+                    report_at += stats.progress_interval
+                if deadline is not None:
+                    deadline.check()
+
+                current_h = h_values[current_state]
+                child_cost = cost + 1
+                for action in expand(current_state):
+                    generated += 1
+                    child = materialise(current_state, action)
+                    known_cost = best_cost.get(child)
+                    if known_cost is not None and known_cost <= child_cost:
+                        duplicates += 1
+                        continue
+                    if delta:
+                        child_h = delta(current_h, current_state, action, goal_state)
+                    else:
+                        child_h = h_values.get(child)
+                        if child_h is None:
+                            child_h = heuristic(child, goal_state)
+                    if incumbent_cost is not None and child_cost + child_h >= incumbent_cost:
+                        continue  # Cannot improve on the incumbent (admissible heuristic)
+
+                    if known_cost is not None:
+                        reopened += 1
+                    best_cost[child] = child_cost
+                    h_values[child] = child_h
+                    prev[child] = current_state
+                    moves[child] = action
+
+                    if child == goal_state:
+                        incumbent = reconstruct_path(prev, moves, initial_state, goal_state)
+                        incumbent_cost = child_cost
+                        improved = True
+                        if on_improvement is not None:
+                            on_improvement(incumbent, weight)
+                    elif child in closed:
+                        inconsistent.add(child)
+                    else:
+                        heapq.heappush(frontier, _entry(weight, child_cost, child_h, child))
+
+        return incumbent, nodes_explored
+    except TimeoutException:
+        if incumbent is None:
+            raise
+        return incumbent, nodes_explored
+    finally:
+        if stats is not None:
+            stats.record(nodes_explored, generated, duplicates, len(frontier), len(best_cost), reopened)
+
+
+def _entry(weight, cost, h_value, state):
+    """
+    Build the frontier entry (key, tie-breaker, g, state) of a state for the given weight.
+    """
+    if weight == GREEDY:
+        return h_value, -cost, cost, state
+    return cost + weight * h_value, h_value, cost, state
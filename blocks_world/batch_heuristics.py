@@ -0,0 +1,169 @@
+"""
+Vectorized heuristics evaluating all the children of an expansion in one pass.
+NumPy is an optional dependency: without it BATCH_AVAILABLE is False and the solvers evaluate their
+heuristics one state at a time.
+"""
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # Batched evaluation is optional; the solvers fall back to one heuristic call per child
+    np = None
+
+from blocks_world.state import TABLE_ID
+
+BATCH_AVAILABLE = np is not None
+BATCH_MIN_BLOCKS = 30  # Below this, the fixed cost of the NumPy calls outweighs the per-state Python loop
+
+
+class GoalVectors:
+    """
+    NumPy form of a goal state, precomputed once per goal for the batched heuristics.
+    """
+
+    __slots__ = ("size", "goal", "has_goal", "target", "jumps", "tower", "depth")
+
+    def __init__(self, goal_state):
+        """
+        Initialize the vectors.
+        :param goal_state: Goal PackedState.
+        """
+        size = len(goal_state.on)
+        self.size = size
+        self.goal = np.frombuffer(goal_state.on, dtype=np.uint8)
+        self.has_goal = self.goal != TABLE_ID
+        self.target = np.where(self.has_goal, self.goal, size).astype(np.intp)  # Goal support, 'size' for the table
+
+        # jumps[t][block] is the block 2 ** t levels below it in its goal tower, or 'size' past the bottom
+        self.jumps = []
+        jump = np.append(self.target, size)
+        while (jump[:size] != size).any():
+            self.jumps.append(jump)
+            jump = jump[jump]
+
+        # Goal tower (bottom block) and goal depth (blocks below it) of each block
+        self.tower = np.empty(size, dtype=np.intp)
+        self.depth = np.empty(size, dtype=np.intp)
+        for block in range(size):
+            bottom, depth = block, 0
+            while goal_state.on[bottom] != TABLE_ID:
+                bottom = goal_state.on[bottom]
+                depth += 1
+            self.tower[block] = bottom
+            self.depth[block] = depth
+
+
+@lru_cache(maxsize=16)
+def goal_vectors(goal_state):
+    """
+    Return the (cached) GoalVectors of a goal state.
+    """
+    return GoalVectors(goal_state)
+
+
+def _rows(states, size):
+    """
+    Stack the packed states into a (states, blocks) uint8 array, one row per state.
+    """
+    return np.frombuffer(b"".join(state.on for state in states), dtype=np.uint8).reshape(len(states), size)
+
+
+def misplaced_blocks_batch(states, goal_state):
+    """
+    Evaluate misplaced_blocks_heuristic on a list of states in one vectorized pass.
+    :param states: List of PackedState objects of the same problem.
+    :param goal_state: Goal PackedState.
+    :return: List of heuristic values, in the order of the states.
+    """
+    vectors = goal_vectors(goal_state)
+    rows = _rows(states, vectors.size)
+    return np.count_nonzero((rows != vectors.goal) & vectors.has_goal, axis=1).tolist()
+
+
+def _tower_counts_batch(states, goal_state, count_twice):
+    """
+    Vectorized form of heuristic_search._tower_counts over a batch of states.
+    A block is well-placed if it and every block below it in its goal tower match their goal support, which
+    pointer doubling along the goal towers settles in a logarithmic number of steps. For the blocks that
+    must move twice, each state's towers are described by the bottom block and the height of every block,
+    also computed by pointer doubling, so 'x lies below y' becomes 'same bottom and lower height'.
+    :param count_twice: Whether to count the blocks that must move twice (otherwise reported as zeros).
+    :return: A tuple of (misplaced counts, must-move-twice counts) arrays, one entry per state.
+    """
+    vectors = goal_vectors(goal_state)
+    size = vectors.size
+    count = len(states)
+    rows = _rows(states, size)
+    matches = rows == vectors.goal
+
+    # Column 'size' stands for the table, which is always well-placed
+    well_placed = np.ones((count, size + 1), dtype=bool)
+    well_placed[:, :size] = matches
+    for jump in vectors.jumps:
+        well_placed &= well_placed[:, jump]
+    misplaced = ~well_placed[:, :size]
+    if not count_twice:
+        return np.count_nonzero(misplaced, axis=1), np.zeros(count, dtype=np.intp)
+
+    # Current supports, with column 'size' again standing for the table and pointing to itself. The doubling
+    # runs on the flattened arrays, with indices offset by the row, as 1-D gathers are the cheapest.
+    width = size + 1
+    offsets = (np.arange(count) * width)[:, None]
+    support = np.full((count, width), size, dtype=np.intp)
+    support[:, :size] = np.where(rows == TABLE_ID, size, rows)
+    on_table = support == size
+    height = (~on_table).astype(np.intp).ravel()  # Becomes the number of blocks below each block
+    bottom = (np.where(on_table, np.arange(width), support) + offsets).ravel()  # Becomes the tower's bottom
+    jump = (support + offsets).ravel()
+    while True:
+        height += height[jump]
+        bottom = bottom[bottom]
+        next_jump = jump[jump]
+        if np.array_equal(next_jump, jump):
+            break
+        jump = next_jump
+    height = height.reshape(count, width)
+    bottom = bottom.reshape(count, width) - offsets
+    bottom[:, size] = -1  # The table is below nothing
+
+    # The goal support lies below a block that is not on it
+    target = vectors.target
+    twice = ~matches & (bottom[:, target] == bottom[:, :size]) & (height[:, target] < height[:, :size])
+
+    # A misplaced block of the goal tower lies below. Sorting the blocks of all states by (state, current
+    # tower, goal tower, height) puts the candidates of each block before it in its segment, so a segmented
+    # running minimum of the goal depth of the misplaced blocks answers every block at once.
+    segments = ((np.arange(count)[:, None] * size + bottom[:, :size]) * size + vectors.tower).ravel()
+    order = np.argsort(segments * size + height[:, :size].ravel())  # Heights are below size
+    segments = segments[order]
+    starts = np.empty(len(segments), dtype=bool)
+    starts[0] = True
+    np.not_equal(segments[1:], segments[:-1], out=starts[1:])
+    offsets = np.cumsum(starts) * (size + 1)  # Later segments get lower values, so the minimum resets
+    depths = np.broadcast_to(vectors.depth, (count, size)).ravel()[order]
+    lowest = np.minimum.accumulate(np.where(misplaced.ravel()[order], depths, size) - offsets) + offsets
+    below = np.empty(len(segments), dtype=np.intp)
+    below[0] = size
+    below[1:] = lowest[:-1]
+    below[starts] = size  # Nothing below the first block of a segment
+    misplaced_below = np.empty(len(segments), dtype=bool)
+    misplaced_below[order] = below < depths
+    twice |= misplaced_below.reshape(count, size)
+    twice &= misplaced
+    return np.count_nonzero(misplaced, axis=1), np.count_nonzero(twice, axis=1)
+
+
+def well_placed_batch(states, goal_state):
+    """
+    Evaluate well_placed_heuristic on a list of states in one vectorized pass.
+    """
+    misplaced, _ = _tower_counts_batch(states, goal_state, count_twice=False)
+    return misplaced.tolist()
+
+
+def deadlock_batch(states, goal_state):
+    """
+    Evaluate deadlock_heuristic on a list of states in one vectorized pass.
+    """
+    misplaced, twice = _tower_counts_batch(states, goal_state, count_twice=True)
+    return (misplaced + twice).tolist()
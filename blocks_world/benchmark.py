@@ -0,0 +1,268 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    import resource  # Peak memory of the worker process (not available on Windows)
+except ImportError:
+    resource = None
+
+from blocks_world.bfs import bfs_solve
+from blocks_world.bidirectional import bidirectional_solve
+from blocks_world.dfs import dfs_solve
+from blocks_world.external_bfs import external_bfs_solve
+from blocks_world.hda_star import hda_star_search
+from blocks_world.heuristic_search import a_star_search, best_first_search, HEURISTICS
+from blocks_world.ida_star import ida_star_search
+from blocks_world.instrumentation import SearchStats
+from blocks_world.problem_parser import load_problem, load_problems
+from blocks_world.utils import solve_with_timeout, TimeoutException
+
+# Solvers selectable by name; heuristic solvers take the heuristic as third argument
+ALGORITHMS = {
+    "bfs": bfs_solve,
+    "external-bfs": external_bfs_solve,
+    "dfs": dfs_solve,
+    "bidirectional": bidirectional_solve,
+    "best": best_first_search,
+    "astar": a_star_search,
+    "ida": partial(ida_star_search, table_size=1_000_000),
+    "hda": hda_star_search,
+}
+HEURISTIC_ALGORITHMS = ("best", "astar", "ida", "hda")
+OPTIMAL_ALGORITHMS = ("bfs", "external-bfs", "bidirectional", "astar", "ida", "hda")  # Always return shortest plans
+DEFAULT_HEURISTIC = "deadlock"
+
+MIN_THROUGHPUT_TIME = 0.1  # Runs shorter than this (in seconds) are too noisy to compare throughput
+
+FIELDS = ("problem", "algorithm", "blocks", "solved", "timed_out", "error", "solution_length", "nodes_expanded",
+          "nodes_generated", "duplicates", "max_frontier", "nodes_per_second", "peak_memory_kb", "wall_time",
+          "cpu_time", "time_successors", "time_heuristic", "time_hashing")
+
+
+def make_solver(spec):
+    """
+    Build a solve function f(initial, goal) from an 'algorithm[:heuristic]' specification.
+    """
+    algorithm, _, heuristic_name = spec.partition(":")
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algorithm {algorithm} is not implemented.")
+    if algorithm not in HEURISTIC_ALGORITHMS:
+        if heuristic_name:
+            raise ValueError(f"Algorithm {algorithm} does not use a heuristic.")
+        return ALGORITHMS[algorithm]
+
+    heuristic_name = heuristic_name or DEFAULT_HEURISTIC
+    if heuristic_name not in HEURISTICS:
+        raise ValueError(f"Heuristic {heuristic_name} is not implemented.")
+    return partial(ALGORITHMS[algorithm], heuristic=HEURISTICS[heuristic_name])
+
+
+def problem_sort_key(path):
+    """
+    Order problem files by block count, then by name (probBLOCKS-4-0 before probBLOCKS-10-0).
+    """
+    name = os.path.basename(path)
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def peak_memory_kb():
+    """
+    Return the peak resident memory of the current process in KiB, or None if it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+
+def run_case(problem_path, spec, timeout, profile=False):
+    """
+    Solve one problem with one algorithm and measure it. Runs inside a fresh worker process.
+    :param profile: Whether to time successor generation, heuristic evaluation and hashing (slows the search).
+    :return: Dictionary with one value per FIELDS entry.
+    """
+    record = dict.fromkeys(FIELDS)
+    record.update(problem=os.path.basename(problem_path), algorithm=spec, solved=False, timed_out=False)
+
+    initial_state, goal_state = load_problem(problem_path).pack()
+    record["blocks"] = len(initial_state.index)
+
+    stats = SearchStats(profile=profile)
+    solve_function = partial(make_solver(spec), stats=stats)
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        solution, _ = solve_with_timeout(solve_function, (initial_state, goal_state), timeout=timeout)
+        record["solved"] = solution is not None
+        record["solution_length"] = len(solution) if solution is not None else None
+    except TimeoutException:
+        record["timed_out"] = True
+    except Exception as e:
+        record["error"] = repr(e)
+    # The statistics are filled on every exit path, so timed-out cases still report how far they got
+    record["nodes_expanded"] = stats.expanded
+    record["nodes_generated"] = stats.generated
+    record["duplicates"] = stats.duplicates
+    record["max_frontier"] = stats.max_frontier_size
+    if profile:
+        for category, seconds in stats.timings.items():
+            record[f"time_{category}"] = round(seconds, 6)
+    record["wall_time"] = round(time.perf_counter() - start_wall, 6)
+    record["cpu_time"] = round(time.process_time() - start_cpu, 6)
+    record["peak_memory_kb"] = peak_memory_kb()
+    if record["wall_time"] > 0:
+        record["nodes_per_second"] = round(record["nodes_expanded"] / record["wall_time"], 1)
+    return record
+
+
+def loader_throughput(paths, repeat=1):
+    """
+    Measure how fast problems are loaded (tokenized, interned and validated).
+    :param paths: Problem files, concatenated problem files or directories.
+    :param repeat: Number of passes over the paths.
+    :return: A tuple of (problems loaded, seconds taken).
+    """
+    count = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            for _ in load_problems(path):
+                count += 1
+    return count, time.perf_counter() - start
+
+
+def run_benchmark(problem_paths, specs, timeout=60, jobs=None, profile=False):
+    """
+    Run every algorithm specification on every problem, each case in its own worker process.
+    :param problem_paths: List of PDDL problem files.
+    :param specs: List of 'algorithm[:heuristic]' specifications.
+    :param timeout: Time limit of each case (in seconds).
+    :param jobs: Number of parallel worker processes (defaults to the number of CPU cores).
+    :param profile: Whether to record where the search time goes (slows the search).
+    :return: List of result dictionaries, in problem then algorithm order.
+    """
+    for spec in specs:
+        make_solver(spec)  # Fail fast on unknown names
+
+    cases = [(path, spec) for path in problem_paths for spec in specs]
+    # One process per case, so that peak memory is measured per case and a crash cannot affect other cases
+    pool_options = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=jobs, **pool_options) as executor:
+        futures = [executor.submit(run_case, path, spec, timeout, profile) for path, spec in cases]
+        results = []
+        for future in futures:
+            record = future.result()
+            results.append(record)
+            print(format_record(record))
+    return results
+
+
+def format_record(record):
+    """
+    Format a result dictionary as a single console line.
+    """
+    if record["solved"]:
+        outcome = f"{record['solution_length']} moves, {record['nodes_expanded']} nodes"
+    elif record["timed_out"]:
+        outcome = "timeout"
+    elif record["error"]:
+        outcome = f"error {record['error']}"
+    else:
+        outcome = "no solution"
+    return f"{record['problem']:<24} {record['algorithm']:<20} {outcome:<32} {record['wall_time']:.3f}s"
+
+
+def save_results(results, csv_path=None, json_path=None):
+    """
+    Save benchmark results as CSV and/or JSON.
+    """
+    if csv_path:
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def compare_with_baseline(results, baseline, tolerance=0.2):
+    """
+    Compare results with a saved baseline run.
+    :param results: List of result dictionaries.
+    :param baseline: List of result dictionaries of the baseline run.
+    :param tolerance: Allowed relative drop of node throughput before it counts as a regression.
+    :return: List of regression descriptions.
+    """
+    previous = {(record["problem"], record["algorithm"]): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get((record["problem"], record["algorithm"]))
+        if old is None or not old["solved"]:
+            continue
+        case = f"{record['problem']} {record['algorithm']}"
+
+        if not record["solved"]:
+            outcome = "timeout" if record["timed_out"] else "unsolved"
+            regressions.append(f"{case}: solved in the baseline, now {outcome}")
+            continue
+        if record["solution_length"] > old["solution_length"]:
+            regressions.append(f"{case}: plan length {old['solution_length']} -> {record['solution_length']}")
+        if old["nodes_per_second"] and record["nodes_per_second"] is not None and \
+                old["wall_time"] >= MIN_THROUGHPUT_TIME and \
+                record["nodes_per_second"] < old["nodes_per_second"] * (1 - tolerance):
+            regressions.append(f"{case}: throughput {old['nodes_per_second']:.0f} -> "
+                               f"{record['nodes_per_second']:.0f} nodes/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Blocks World solvers over a set of PDDL problems.")
+    parser.add_argument("--algorithms", nargs="+", default=["bidirectional", "astar:deadlock", "ida:deadlock"],
+                        help="algorithm[:heuristic] specifications")
+    parser.add_argument("--problems", default="./data/problems/probBLOCKS-*.pddl", help="glob of problem files")
+    parser.add_argument("--timeout", type=int, default=60, help="time limit of each case in seconds")
+    parser.add_argument("--jobs", type=int, default=None, help="number of parallel worker processes")
+    parser.add_argument("--profile", action="store_true",
+                        help="record time spent in successor generation, heuristics and hashing")
+    parser.add_argument("--csv", help="write the results to this CSV file")
+    parser.add_argument("--json", help="write the results to this JSON file (usable as a baseline)")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative throughput drop")
+    parser.add_argument("--loader", type=int, metavar="REPEAT",
+                        help="only measure problem loading, over REPEAT passes of the problems")
+    args = parser.parse_args()
+
+    problem_paths = sorted(glob.glob(args.problems), key=problem_sort_key)
+    if not problem_paths:
+        print(f"Error: No problem files match {args.problems}.")
+        sys.exit(1)
+
+    if args.loader:
+        count, seconds = loader_throughput(problem_paths, repeat=args.loader)
+        print(f"Loaded {count} problems in {seconds:.3f}s ({count / seconds:.0f} problems/s)")
+        return
+
+    results = run_benchmark(problem_paths, args.algorithms, timeout=args.timeout, jobs=args.jobs,
+                            profile=args.profile)
+    save_results(results, csv_path=args.csv, json_path=args.json)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
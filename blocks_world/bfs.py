@@ -1,41 +1,56 @@
 from collections import deque
 
-from blocks_world.graph import generate_neighbors
+from blocks_world.graph import successors, apply_move
+from blocks_world.instrumentation import instrument, next_report
 from blocks_world.utils import reconstruct_path
 
 
-def bfs_solve(initial_state, goal_state):
+def bfs_solve(initial_state, goal_state, stats=None, deadline=None):
     """
     Solve the Blocks World problem using BFS.
-    :param initial_state: BlockWorldState object representing the initial state.
-    :param goal_state: BlockWorldState object representing the goal state.
+    :param initial_state: PackedState object representing the initial state.
+    :param goal_state: PackedState object representing the goal state.
+    :param stats: Optional SearchStats object collecting counters and timings.
+    :param deadline: Optional Deadline checked once per expansion.
     :return: A tuple of (solution path as a list of moves, number of nodes explored).
     """
+    expand, materialise, _, _ = instrument(stats, successors, apply_move)
     frontier = deque([initial_state])  # Queue for BFS
-    visited = set()  # Track visited states
-    prev = {initial_state: None}  # Map to reconstruct the path
+    prev = {initial_state: None}  # Map to reconstruct the path; doubles as the index of generated states
     moves = {initial_state: None}  # Store the action leading to each state
-    nodes_explored = 0
-
-    while frontier:
-        # Dequeue the next state
-        current_state = frontier.popleft()
-        nodes_explored += 1
-
-        # Check if the goal is reached
-        if current_state == goal_state:
-            # Reconstruct the solution path and return
-            solution_path = reconstruct_path(prev, moves, initial_state, current_state)
-            return solution_path, nodes_explored
-
-        # Mark the current state as visited
-        visited.add(current_state)
-
-        # Expand neighbors
-        for neighbor in generate_neighbors(current_state):
-            if neighbor not in visited and neighbor not in frontier:
-                frontier.append(neighbor)
-                prev[neighbor] = current_state  # Store the predecessor
-                moves[neighbor] = neighbor.action  # Store the action leading to this state
-
-    return None, nodes_explored
+    nodes_explored = generated = duplicates = 0
+    report_at = next_report(stats)
+
+    try:
+        while frontier:
+            # Dequeue the next state
+            current_state = frontier.popleft()
+            nodes_explored += 1
+            if nodes_explored == report_at:
+                stats.record(nodes_explored, generated, duplicates, len(frontier), len(prev))
+                report_at += stats.progress_interval
+            if deadline is not None:
+                deadline.check()
+
+            # Check if the goal is reached
+            if current_state == goal_state:
+                # Reconstruct the solution path and return
+                solution_path = reconstruct_path(prev, moves, initial_state, current_state)
+                return solution_path, nodes_explored
+
+            # Expand neighbors
+            for action in expand(current_state):
+                neighbor = materialise(current_state, action)
+                generated += 1
+                # A state is generated once: it is either still in the frontier or already expanded
+                if neighbor not in prev:
+                    frontier.append(neighbor)
+                    prev[neighbor] = current_state  # Store the predecessor
+                    moves[neighbor] = action  # Store the action leading to this state
+                else:
+                    duplicates += 1
+
+        return None, nodes_explored
+    finally:
+        if stats is not None:
+            stats.record(nodes_explored, generated, duplicates, len(frontier), len(prev))
@@ -0,0 +1,109 @@
+from blocks_world.graph import successors, apply_move
+from blocks_world.instrumentation import instrument
+from blocks_world.utils import reconstruct_path
+
+
+def bidirectional_solve(initial_state, goal_state, stats=None, deadline=None):
+    """
+    Solve the Blocks World problem using bidirectional BFS.
+    Moves are reversible, so the goal side is searched with the same successors as the initial side;
+    each step expands one whole layer of the smaller frontier, and the first state generated by both
+    searches closes an optimal plan.
+    Goals only list ON atoms: packing places every other block on the table, which is the same complete
+    configuration the other solvers test against with state == goal_state.
+    :param initial_state: PackedState object representing the initial state.
+    :param goal_state: PackedState object representing the goal state.
+    :param stats: Optional SearchStats object collecting counters and timings (sampled once per layer).
+    :param deadline: Optional Deadline checked once per expansion.
+    :return: A tuple of (solution path as a list of moves, number of nodes explored).
+    """
+    if initial_state == goal_state:
+        return [], 1
+
+    functions = instrument(stats, successors, apply_move)[:2]
+    forward_prev = {initial_state: None}  # Predecessor of each state reached from the initial state
+    forward_moves = {initial_state: None}  # Move leading to each of those states
+    backward_next = {goal_state: None}  # Successor towards the goal of each state reached from the goal
+    backward_moves = {goal_state: None}  # Move leading from that successor back to the state
+    forward_layer = [initial_state]
+    backward_layer = [goal_state]
+    nodes_explored = generated = 0
+
+    try:
+        while forward_layer and backward_layer:
+            # Expand the smaller frontier to keep both searches balanced
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting_state, expanded, children = _expand_layer(
+                    forward_layer, forward_prev, forward_moves, backward_next, functions, deadline)
+            else:
+                backward_layer, meeting_state, expanded, children = _expand_layer(
+                    backward_layer, backward_next, backward_moves, forward_prev, functions, deadline)
+            nodes_explored += expanded
+            generated += children
+
+            if meeting_state is not None:
+                solution_path = reconstruct_path(forward_prev, forward_moves, initial_state, meeting_state)
+                solution_path += _backward_path(backward_next, backward_moves, meeting_state, goal_state)
+                return solution_path, nodes_explored
+
+            if stats is not None:
+                _record(stats, nodes_explored, generated, forward_layer, backward_layer, forward_prev, backward_next)
+
+        return None, nodes_explored
+    finally:
+        if stats is not None:
+            _record(stats, nodes_explored, generated, forward_layer, backward_layer, forward_prev, backward_next)
+
+
+def _record(stats, nodes_explored, generated, forward_layer, backward_layer, forward_prev, backward_next):
+    """
+    Store the counters of both sides of the search in the statistics.
+    """
+    seen = len(forward_prev) + len(backward_next)
+    duplicates = max(generated - (seen - 2), 0)  # Children of an interrupted layer are not counted as generated
+    stats.record(nodes_explored, generated, duplicates, len(forward_layer) + len(backward_layer), seen)
+
+
+def _expand_layer(layer, parents, moves, other_parents, functions, deadline):
+    """
+    Expand one BFS layer of one side of the search.
+    :param layer: List of states at the current depth.
+    :param parents: Parent map of this side; doubles as its index of generated states.
+    :param moves: Map of the move that generated each state of this side.
+    :param other_parents: Parent map of the opposite side.
+    :param functions: (successors, apply_move) pair returned by instrument().
+    :param deadline: Deadline checked once per expanded state, or None.
+    :return: A tuple of (next layer, meeting state or None, number of states expanded, number of children generated).
+    """
+    expand, materialise = functions
+    next_layer = []
+    generated = 0
+    for expanded, current_state in enumerate(layer, start=1):
+        if deadline is not None:
+            deadline.check()
+        for action in expand(current_state):
+            neighbor = materialise(current_state, action)
+            generated += 1
+            if neighbor in parents:
+                continue
+            parents[neighbor] = current_state
+            moves[neighbor] = action
+            if neighbor in other_parents:
+                return next_layer, neighbor, expanded, generated
+            next_layer.append(neighbor)
+    return next_layer, None, len(layer), generated
+
+
+def _backward_path(backward_next, backward_moves, meeting_state, goal_state):
+    """
+    Turn the goal side of the search into forward moves from the meeting state to the goal.
+    """
+    index = goal_state.index
+    path = []
+    current = meeting_state
+    while current != goal_state:
+        # The goal side moved the block from 'to' back to 'from'; going forward undoes that move
+        block, from_location, to_location = backward_moves[current]
+        path.append(index.format_move((block, to_location, from_location)))
+        current = backward_next[current]
+    return path
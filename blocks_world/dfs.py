@@ -1,38 +1,64 @@
-from blocks_world.graph import generate_neighbors
+from blocks_world.graph import successors, apply_move
+from blocks_world.instrumentation import instrument, next_report
 from blocks_world.utils import reconstruct_path
 
 
-def dfs_solve(initial_state, goal_state):
+def dfs_solve(initial_state, goal_state, stats=None, deadline=None):
     """
     Solve the Blocks World problem using DFS.
-    :param initial_state: BlockWorldState object representing the initial state.
-    :param goal_state: BlockWorldState object representing the goal state.
+    Each stack entry holds a state and its lazy move generator, so a child state is only built when the
+    search descends into it instead of materialising every neighbor of every expanded state.
+    :param initial_state: PackedState object representing the initial state.
+    :param goal_state: PackedState object representing the goal state.
+    :param stats: Optional SearchStats object collecting counters and timings.
+    :param deadline: Optional Deadline checked once per expansion.
     :return: A tuple of (solution path as a list of moves, number of nodes explored).
     """
-    frontier = [initial_state]  # Stack for DFS
-    visited = set()  # Track visited states
-    prev = {initial_state: None}  # Map to reconstruct the path
+    expand, materialise, _, _ = instrument(stats, successors, apply_move)
+    frontier = [(initial_state, iter(expand(initial_state)))]  # Stack for DFS
+    prev = {initial_state: None}  # Map to reconstruct the path; doubles as the index of generated states
     moves = {initial_state: None}  # Store the action leading to each state
-    nodes_explored = 0
+    nodes_explored = 1
+    generated = duplicates = 0
+    report_at = next_report(stats)
 
-    while frontier:
-        # Pop the last state (LIFO behavior)
-        current_state = frontier.pop()
-        nodes_explored += 1
+    if initial_state == goal_state:
+        return [], nodes_explored
 
-        # Check if the goal is reached
-        if current_state == goal_state:
-            print("Goal state matched!")
-            solution_path = reconstruct_path(prev, moves, initial_state, current_state)
-            return solution_path, nodes_explored
+    try:
+        while frontier:
+            # Continue with the deepest state (LIFO behavior)
+            current_state, actions = frontier[-1]
 
-        visited.add(current_state)
+            # Take its next untried move, backtracking once all of them are exhausted
+            action = next(actions, None)
+            if action is None:
+                frontier.pop()
+                continue
 
-        # Expand neighbors
-        for neighbor in generate_neighbors(current_state):
-            if neighbor not in visited and neighbor not in frontier:
-                frontier.append(neighbor)  # Push to the stack
-                prev[neighbor] = current_state  # Store the predecessor
-                moves[neighbor] = neighbor.action  # Store the action leading to this state
+            neighbor = materialise(current_state, action)
+            generated += 1
+            if neighbor in prev:
+                duplicates += 1
+                continue
+            prev[neighbor] = current_state  # Store the predecessor
+            moves[neighbor] = action  # Store the action leading to this state
+            nodes_explored += 1
+            if nodes_explored == report_at:
+                stats.record(nodes_explored, generated, duplicates, len(frontier), len(prev))
+                report_at += stats.progress_interval
+            if deadline is not None:
+                deadline.check()
 
-    return None, nodes_explored
+            # Check if the goal is reached
+            if neighbor == goal_state:
+                print("Goal state matched!")
+                solution_path = reconstruct_path(prev, moves, initial_state, neighbor)
+                return solution_path, nodes_explored
+
+            frontier.append((neighbor, iter(expand(neighbor))))  # Push to the stack
+
+        return None, nodes_explored
+    finally:
+        if stats is not None:
+            stats.record(nodes_explored, generated, duplicates, len(frontier), len(prev))
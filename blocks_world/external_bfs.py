@@ -0,0 +1,238 @@
+import heapq
+import os
+import shutil
+import tempfile
+
+from blocks_world.graph import successors, apply_move
+from blocks_world.state import PackedState
+
+BUFFER_STATES = 1_000_000  # Children sorted in memory before they are spilled to a run file
+READ_CHUNK = 8192  # Records read from a file at a time
+
+
+def external_bfs_solve(initial_state, goal_state, directory=None, buffer_states=BUFFER_STATES, stats=None,
+                       deadline=None):
+    """
+    Breadth-first search keeping its layers on disk instead of in memory (see bfs_layers).
+    Once the goal's layer is written, the plan is reconstructed by scanning the earlier layer files backwards
+    for a predecessor of each state on the path, so no parent pointers are stored.
+    :param initial_state: PackedState object representing the initial state.
+    :param goal_state: PackedState object representing the goal state.
+    :param directory: Directory for the layer files (kept), or None for a temporary one removed afterwards.
+    :param buffer_states: Number of states sorted in memory at a time; bounds the memory used.
+    :param stats: Optional SearchStats object collecting counters.
+    :param deadline: Optional Deadline checked once per expansion.
+    :return: A tuple of (solution path as a list of moves, number of nodes explored).
+    """
+    if initial_state == goal_state:
+        return [], 1
+
+    work_directory = directory or tempfile.mkdtemp(prefix="blocks-bfs-")
+    counters = [0, 0, 0, 0]  # Expanded, generated, duplicates and stored states
+    try:
+        layer_paths = []
+        for depth, path, count in bfs_layers(initial_state, work_directory, buffer_states, counters, stats,
+                                             deadline, stop_at=goal_state.on):
+            layer_paths.append(path)
+            if _contains(path, goal_state.on):
+                actions = _trace_back(goal_state, layer_paths[:-1], deadline)
+                index = goal_state.index
+                return [index.format_move(action) for action in actions], counters[0]
+        return None, counters[0]
+    finally:
+        if stats is not None:
+            stats.record(counters[0], counters[1], counters[2], 0, counters[3])
+        if directory is None:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+
+def bfs_layers(initial_state, directory, buffer_states=BUFFER_STATES, counters=None, stats=None, deadline=None,
+               stop_at=None):
+    """
+    Explore the state space breadth-first with delayed duplicate detection, one layer file at a time.
+    Layer d is a file of the sorted, distinct packed states at distance d. Layer d + 1 is built by streaming
+    layer d, buffering its children in memory, and spilling each full buffer as a sorted run file. The runs
+    are then merged, and a streaming merge against layers d and d - 1 removes the states already known:
+    moves are reversible, so a child of layer d can only be at distance d - 1, d or d + 1. Only the sorted
+    buffer is held in memory, and every file is read and written sequentially.
+    :param initial_state: Initial PackedState.
+    :param directory: Existing directory for the layer and run files.
+    :param buffer_states: Number of states sorted in memory at a time.
+    :param counters: Optional [expanded, generated, duplicates, stored] list, updated in place.
+    :param stats: Optional SearchStats object, updated at its progress interval.
+    :param deadline: Optional Deadline checked once per expansion.
+    :param stop_at: Optional packed bytes of a state; exploration stops after the layer containing it.
+    :return: Generator of (depth, layer file path, number of states) tuples, the last layer being non-empty.
+    """
+    counters = counters if counters is not None else [0, 0, 0, 0]
+    size = len(initial_state.on)
+    index = initial_state.index
+    report_at = stats.progress_interval if stats is not None else 0
+
+    previous_path = None
+    current_path = os.path.join(directory, "layer-0.bin")
+    _write_records(current_path, [initial_state.on])
+    counters[3] += 1
+    depth = 0
+    yield depth, current_path, 1
+    if initial_state.on == stop_at:
+        return
+
+    while True:
+        # Expand the current layer into sorted, duplicate-free runs
+        run_paths = []
+        buffer = []
+        for on in _read_records(current_path, size):
+            state = PackedState(on, index)
+            counters[0] += 1
+            if counters[0] == report_at:
+                stats.record(counters[0], counters[1], counters[2], 0, counters[3])
+                report_at += stats.progress_interval
+            if deadline is not None:
+                deadline.check()
+            before = len(buffer)
+            buffer.extend(apply_move(state, action).on for action in successors(state))
+            counters[1] += len(buffer) - before
+            if len(buffer) >= buffer_states:
+                run_paths.append(_spill(buffer, directory, depth + 1, len(run_paths)))
+                buffer = []
+        if buffer or not run_paths:
+            run_paths.append(_spill(buffer, directory, depth + 1, len(run_paths)))
+
+        # Merge the runs and drop the states of the two previous layers
+        children = _unique(heapq.merge(*(_read_records(path, size) for path in run_paths)))
+        known = [_read_records(current_path, size)]
+        if previous_path is not None:
+            known.append(_read_records(previous_path, size))
+        next_path = os.path.join(directory, f"layer-{depth + 1}.bin")
+        count = _write_records(next_path, _subtract(children, heapq.merge(*known)), deadline)
+        for path in run_paths:
+            os.remove(path)
+        counters[2] = counters[1] - counters[3] - count + 1  # Every generated state not stored is a duplicate
+        counters[3] += count
+        if count == 0:
+            os.remove(next_path)
+            return
+        depth += 1
+        yield depth, next_path, count
+        if stop_at is not None and _contains(next_path, stop_at):
+            return
+        previous_path, current_path = current_path, next_path
+
+
+def _spill(buffer, directory, depth, number):
+    """
+    Sort a buffer of packed states, drop its duplicates and write it as a run file.
+    :return: Path of the run file.
+    """
+    path = os.path.join(directory, f"run-{depth}-{number}.bin")
+    _write_records(path, sorted(set(buffer)))
+    return path
+
+
+def _write_records(path, records, deadline=None):
+    """
+    Write packed states back to back.
+    :param deadline: Optional Deadline checked once per chunk, as records may come from a long merge.
+    :return: Number of records written.
+    """
+    count = 0
+    with open(path, "wb") as f:
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == READ_CHUNK:
+                if deadline is not None:
+                    deadline.check()
+                f.write(b"".join(chunk))
+                count += len(chunk)
+                chunk = []
+        f.write(b"".join(chunk))
+        count += len(chunk)
+    return count
+
+
+def _read_records(path, size):
+    """
+    Stream the packed states of a file written by _write_records.
+    """
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(size * READ_CHUNK)
+            if not data:
+                return
+            for offset in range(0, len(data), size):
+                yield data[offset:offset + size]
+
+
+def _unique(records):
+    """
+    Drop repeated records from a sorted stream.
+    """
+    last = None
+    for record in records:
+        if record != last:
+            yield record
+            last = record
+
+
+def _subtract(records, excluded):
+    """
+    Yield the records of a sorted stream that do not appear in another sorted stream.
+    """
+    excluded = iter(excluded)
+    current = next(excluded, None)
+    for record in records:
+        while current is not None and current < record:
+            current = next(excluded, None)
+        if record != current:
+            yield record
+
+
+def _contains(path, record):
+    """
+    Return True if a layer file contains the given packed state, by binary search over its sorted records.
+    """
+    size = len(record)
+    with open(path, "rb") as f:
+        low, high = 0, os.path.getsize(path) // size
+        while low < high:
+            middle = (low + high) // 2
+            f.seek(middle * size)
+            on = f.read(size)
+            if on == record:
+                return True
+            if on < record:
+                low = middle + 1
+            else:
+                high = middle
+    return False
+
+
+def _trace_back(goal_state, layer_paths, deadline):
+    """
+    Rebuild a shortest path to the goal, whose layer follows the given ones, by scanning each earlier layer
+    for a neighbor of the next state on the path.
+    :param goal_state: Goal PackedState.
+    :param layer_paths: Paths of the layers 0 to d - 1, if the goal is at depth d.
+    :return: List of (block, from, to) actions from the initial state to the goal.
+    :raise RuntimeError: If a layer holds no neighbor of the next state, i.e. the layer files are inconsistent.
+    """
+    actions = []
+    current = goal_state
+    for depth, path in reversed(list(enumerate(layer_paths))):
+        # Moves are reversible: the predecessor is a neighbor, and the move back reverses the neighbor move
+        neighbors = {apply_move(current, action).on: action for action in successors(current)}
+        for on in _read_records(path, len(current.on)):
+            if deadline is not None:
+                deadline.check()
+            action = neighbors.get(on)
+            if action is not None:
+                block, from_location, to_location = action
+                actions.append((block, to_location, from_location))
+                current = PackedState(on, current.index)
+                break
+        else:
+            raise RuntimeError(f"Layer {depth} ({path}) holds no predecessor of a state of layer {depth + 1}.")
+    actions.reverse()
+    return actions
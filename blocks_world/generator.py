@@ -0,0 +1,154 @@
+import argparse
+import os
+import random
+from functools import lru_cache
+from math import comb, factorial
+
+from blocks_world.state import BlockWorldState
+
+
+@lru_cache(maxsize=None)
+def lah_number(n, k):
+    """
+    Unsigned Lah number L(n, k): the number of ways to arrange n labelled blocks into k (unordered) towers.
+    """
+    if k < 1 or k > n:
+        return 0
+    return comb(n - 1, k - 1) * factorial(n) // factorial(k)
+
+
+@lru_cache(maxsize=None)
+def state_count(n):
+    """
+    Number of distinct Blocks World states of n blocks.
+    """
+    return sum(lah_number(n, k) for k in range(1, n + 1)) if n else 1
+
+
+def random_towers(blocks, rng=random):
+    """
+    Draw a Blocks World state of the given blocks uniformly at random.
+    The number of towers k is drawn with probability L(n, k) / state_count(n); a random permutation of
+    the blocks is then cut into k non-empty towers at k - 1 distinct random positions. Each state with
+    k towers arises from exactly k! (permutation, cut) pairs, so every state is equally likely.
+    :param blocks: List of block names.
+    :param rng: random.Random instance (or the random module).
+    :return: List of towers, each a list of blocks from the bottom up.
+    """
+    n = len(blocks)
+    if n == 0:
+        return []
+    pick = rng.randrange(state_count(n))
+    k = 1
+    while pick >= lah_number(n, k):
+        pick -= lah_number(n, k)
+        k += 1
+
+    order = list(blocks)
+    rng.shuffle(order)
+    cuts = sorted(rng.sample(range(1, n), k - 1))
+    return [order[start:end] for start, end in zip([0] + cuts, cuts + [n])]
+
+
+def towers_to_state(towers):
+    """
+    Convert a list of towers (bottom-up lists of blocks) into a BlockWorldState.
+    """
+    on = {}
+    for tower in towers:
+        for below, block in zip(tower, tower[1:]):
+            on[block] = below
+    return BlockWorldState(clear={tower[-1] for tower in towers}, onTable={tower[0] for tower in towers}, on=on)
+
+
+def block_names(n):
+    """
+    Return the names of n blocks: B1, B2, ...
+    """
+    return [f"B{number}" for number in range(1, n + 1)]
+
+
+def random_problem(n, seed=None):
+    """
+    Generate a problem with uniformly random initial and goal states.
+    :param n: Number of blocks.
+    :param seed: Seed of the random generator (None for a random one).
+    :return: A tuple of (initial BlockWorldState, goal BlockWorldState).
+    """
+    rng = random.Random(seed)
+    blocks = block_names(n)
+    return towers_to_state(random_towers(blocks, rng)), towers_to_state(random_towers(blocks, rng))
+
+
+def to_pddl(name, initial_state, goal_state):
+    """
+    Format a problem in the PDDL layout of the files in data/problems.
+    The goal lists ON atoms only; blocks without one belong on the table.
+    """
+    blocks = sorted(initial_state.onTable | set(initial_state.on), key=_name_key)
+    init_atoms = [f"(CLEAR {block})" for block in sorted(initial_state.clear, key=_name_key)]
+    init_atoms += [f"(ONTABLE {block})" for block in sorted(initial_state.onTable, key=_name_key)]
+    init_atoms += [f"(ON {block} {below})" for block, below in sorted(initial_state.on.items())]
+    init_atoms.append("(HANDEMPTY)")
+    goal_atoms = [f"(ON {block} {below})" for block, below in sorted(goal_state.on.items())]
+    return (f"(define (problem {name})\n"
+            f"(:domain BLOCKS)\n"
+            f"(:objects {' '.join(blocks)} )\n"
+            f"(:INIT {' '.join(init_atoms)})\n"
+            f"(:goal (AND {' '.join(goal_atoms)}))\n"
+            f")\n")
+
+
+def _name_key(block):
+    return len(block), block  # B2 before B10
+
+
+def write_problems(directory, sizes, count=1, seed=0, concatenate=False):
+    """
+    Generate random problems and write them as PDDL files.
+    Problem i of size n is seeded with (seed, n, i), so each one can be regenerated on its own.
+    :param directory: Output directory.
+    :param sizes: Block counts.
+    :param count: Number of problems per block count.
+    :param seed: Base seed.
+    :param concatenate: Whether to write all problems into a single generated.pddl file.
+    :return: List of written file paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    texts = []
+    for n in sizes:
+        for number in range(count):
+            initial_state, goal_state = random_problem(n, seed=f"{seed}-{n}-{number}")
+            texts.append((f"RANDOM-{n}-{number}", to_pddl(f"RANDOM-{n}-{number}", initial_state, goal_state)))
+
+    if concatenate:
+        path = os.path.join(directory, "generated.pddl")
+        with open(path, "w") as f:
+            f.writelines(text for _, text in texts)
+        return [path]
+
+    paths = []
+    for name, text in texts:
+        path = os.path.join(directory, f"prob{name}.pddl")
+        with open(path, "w") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate uniformly random Blocks World problems as PDDL files.")
+    parser.add_argument("--blocks", type=int, nargs="+", required=True, help="block counts")
+    parser.add_argument("--count", type=int, default=1, help="problems per block count")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    parser.add_argument("--output", default="./data/generated", help="output directory")
+    parser.add_argument("--concatenate", action="store_true", help="write all problems into one file")
+    args = parser.parse_args()
+
+    paths = write_problems(args.output, args.blocks, count=args.count, seed=args.seed,
+                           concatenate=args.concatenate)
+    print(f"Wrote {len(paths)} file(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
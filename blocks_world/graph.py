@@ -1,47 +1,69 @@
-from blocks_world.state import move
+from collections import deque
 
+from blocks_world.state import TABLE_ID, move_packed
 
-def generate_neighbors(state):
+
+def successors(state):
     """
-    Generate all valid neighbor states from the current state.
-    :param state: BlockWorldState object.
-    :return: List of BlockWorldState objects representing neighbor states.
+    Lazily generate the valid moves from the current state, without building any neighbor state.
+    :param state: PackedState object.
+    :return: Generator of (block, from, to) tuples of block ids (to is TABLE_ID for the table).
     """
-    neighbors = []
+    clear = state.clear_blocks()
+    on = state.on
 
     # Generate moves for each clear block
-    for block in state.clear:
+    for block in clear:
+        from_location = on[block]
+
         # Move block to another block
-        for destination in state.clear:
+        for destination in clear:
             if block != destination:
-                new_state = move(state, block, "TABLE" if block in state.onTable else state.on.get(block), destination)
-                neighbors.append(new_state)
+                yield block, from_location, destination
 
         # Move block to the table
-        if block not in state.onTable:
-            new_state = move(state, block, state.on.get(block), "TABLE")
-            neighbors.append(new_state)
+        if from_location != TABLE_ID:
+            yield block, from_location, TABLE_ID
 
-    return neighbors
+
+def apply_move(state, action):
+    """
+    Materialise the neighbor state reached by a move produced by successors().
+    :param state: PackedState object.
+    :param action: (block, from, to) tuple.
+    :return: New PackedState object.
+    """
+    return move_packed(state, action[0], action[2])
+
+
+def generate_neighbors(state):
+    """
+    Generate all valid neighbor states from the current state.
+    :param state: PackedState object.
+    :return: List of (action, neighbor) pairs, where action is a (block, from, to) tuple of block ids
+             and neighbor is the PackedState reached by it.
+    """
+    return [(action, apply_move(state, action)) for action in successors(state)]
 
 
 def build_graph(initial_state):
     """
     Build the state space graph starting from the initial state.
-    :param initial_state: BlockWorldState representing the initial state.
+    For anything but tiny problems, state_graph.build_state_graph stores the same graph far more compactly.
+    :param initial_state: PackedState representing the initial state.
     :return: Dictionary representing the graph (nodes and edges).
     """
     graph = {}  # Dictionary to store the graph
     visited = set()  # Track visited states
-    queue = [initial_state]  # BFS queue
+    queue = deque([initial_state])  # BFS queue
 
     while queue:
-        current_state = queue.pop(0)  # Dequeue a state
+        current_state = queue.popleft()  # Dequeue a state
         if current_state in visited:
             continue
 
         visited.add(current_state)  # Mark as visited
-        neighbors = generate_neighbors(current_state)  # Generate neighbor states
+        neighbors = [neighbor for _, neighbor in generate_neighbors(current_state)]  # Generate neighbor states
         graph[current_state] = neighbors  # Add to the graph
 
         for neighbor in neighbors:
@@ -54,7 +76,7 @@ def build_graph(initial_state):
 def print_graph(graph):
     """
     Print the graph dictionary in a readable format and display the total number of nodes.
-    :param graph: Dictionary where keys are BlockWorldState nodes and values are lists of neighbor nodes.
+    :param graph: Dictionary where keys are PackedState nodes and values are lists of neighbor nodes.
     """
     print("\nGraph Representation:")
     print("=" * 50)
@@ -0,0 +1,255 @@
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+import zlib
+
+from blocks_world.graph import successors, apply_move
+from blocks_world.heuristic_search import heuristic_delta
+from blocks_world.state import PackedState
+
+BATCH_SIZE = 256  # Children buffered per destination worker before they are sent
+EXPANSION_CHUNK = 64  # Expansions between two polls of the inbox
+POLL_INTERVAL = 0.002  # Seconds between two termination checks of the coordinator
+REPLY_TIMEOUT = 0.1  # Seconds the coordinator waits for a trace reply before checking the workers again
+UNBOUNDED = 2 ** 62  # Upper bound before any plan is found
+
+# Per-worker counters in the shared statistics array
+EXPANDED, GENERATED, DUPLICATES, FRONTIER, CLOSED = range(5)
+COUNTERS = 5
+
+
+def owner(on, workers):
+    """
+    Return the worker owning a state: its packed bytes hashed with CRC-32, which unlike hash() is the same
+    in every process.
+    """
+    return zlib.crc32(on) % workers
+
+
+def hda_star_search(initial_state, goal_state, heuristic, workers=None, batch_size=BATCH_SIZE, stats=None,
+                    deadline=None):
+    """
+    Hash-distributed A* (HDA*): states are partitioned among worker processes by hash, each with its own
+    open and closed lists. A worker expanding a state sends every child to the child's owner, in batches
+    over multiprocessing queues; children it owns itself go straight into its open list.
+    Workers only expand states whose f is below the cost of the best plan found so far (a shared upper
+    bound), so once every worker is idle and no batch is in flight no cheaper plan can exist. That moment
+    is detected by counting batches: each process counts the batches it sent and received in shared
+    memory, and the search ends when two consecutive scans see every worker idle and the same, balanced
+    counts. The plan is then traced back through the parent pointers kept by the owners of its states.
+    :param initial_state: Initial PackedState.
+    :param goal_state: Goal PackedState.
+    :param heuristic: Admissible heuristic function (module-level, so worker processes can use it).
+                      If it has a 'delta' attribute, children are evaluated incrementally (see heuristic_delta).
+    :param workers: Number of worker processes (defaults to the number of CPU cores).
+    :param batch_size: Number of children buffered per destination worker before they are sent.
+    :param stats: Optional SearchStats object collecting counters (summed over all workers).
+    :param deadline: Optional Deadline checked by the coordinator between termination checks.
+    :return: Solution path and nodes explored.
+    :raise RuntimeError: If a worker process exits before the search is over.
+    """
+    if initial_state == goal_state:
+        return [], 1
+
+    workers = workers or os.cpu_count() or 1
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    replies = multiprocessing.Queue()
+    sent = multiprocessing.Array("q", workers + 1, lock=False)  # Slot 'workers' belongs to the coordinator
+    received = multiprocessing.Array("q", workers, lock=False)
+    idle = multiprocessing.Array("b", workers, lock=False)
+    counters = multiprocessing.Array("q", workers * COUNTERS, lock=False)
+    upper_bound = multiprocessing.Value("q", UNBOUNDED)
+
+    processes = [multiprocessing.Process(target=_worker,
+                                         args=(rank, workers, goal_state, heuristic, batch_size, inboxes, replies,
+                                               sent, received, idle, counters, upper_bound),
+                                         daemon=True)
+                 for rank in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        # Seed the search with the initial state
+        initial_h = heuristic(initial_state, goal_state)
+        sent[workers] += 1
+        inboxes[owner(initial_state.on, workers)].put(("nodes", [(initial_state.on, 0, initial_h, None, None)]))
+
+        report_at = time.monotonic()
+        previous = None
+        while True:
+            time.sleep(POLL_INTERVAL)
+            if deadline is not None:
+                deadline.check()
+            _check_workers(processes)
+            if stats is not None and time.monotonic() >= report_at:
+                _record(stats, counters, workers)
+                report_at += 0.5
+            snapshot = (list(idle), list(sent), list(received))
+            if all(snapshot[0]) and sum(snapshot[1]) == sum(snapshot[2]) and snapshot == previous:
+                break  # Every worker idle, nothing in flight, and nothing changed since the last scan
+            previous = snapshot
+
+        if upper_bound.value == UNBOUNDED:
+            return None, _expanded(counters, workers)
+
+        # Follow the parent pointers from the goal back to the initial state, asking each state's owner
+        actions = []
+        current = goal_state.on
+        while current != initial_state.on:
+            inboxes[owner(current, workers)].put(("trace", current))
+            current, action = _wait_reply(replies, processes, deadline)
+            actions.append(action)
+        actions.reverse()
+        index = goal_state.index
+        return [index.format_move(action) for action in actions], _expanded(counters, workers)
+    finally:
+        for inbox in inboxes:
+            inbox.put(("stop", None))
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        if stats is not None:
+            _record(stats, counters, workers)
+
+
+def _check_workers(processes):
+    """
+    :raise RuntimeError: If a worker process has exited (crashed or raised), as its states would be lost.
+    """
+    for rank, process in enumerate(processes):
+        if not process.is_alive():
+            raise RuntimeError(f"HDA* worker {rank} exited unexpectedly (exit code {process.exitcode}).")
+
+
+def _wait_reply(replies, processes, deadline):
+    """
+    Wait for a trace reply, checking the deadline and the workers while waiting.
+    """
+    while True:
+        timeout = REPLY_TIMEOUT
+        if deadline is not None:
+            deadline.check()
+            remaining = deadline.remaining()
+            if remaining is not None:
+                timeout = max(min(timeout, remaining), POLL_INTERVAL)
+        try:
+            return replies.get(timeout=timeout)
+        except queue.Empty:
+            _check_workers(processes)
+
+
+def _expanded(counters, workers):
+    return sum(counters[rank * COUNTERS + EXPANDED] for rank in range(workers))
+
+
+def _record(stats, counters, workers):
+    """
+    Pass the counters summed over all workers to stats.record().
+    """
+    totals = [sum(counters[rank * COUNTERS + field] for rank in range(workers)) for field in range(COUNTERS)]
+    stats.record(totals[EXPANDED], totals[GENERATED], totals[DUPLICATES], totals[FRONTIER], totals[CLOSED])
+
+
+def _worker(rank, workers, goal_state, heuristic, batch_size, inboxes, replies, sent, received, idle, counters,
+            upper_bound):
+    """
+    Search the states owned by one worker until the coordinator sends 'stop'.
+    Messages are ('nodes', [(on, g, h, parent_on, action), ...]) batches of children, ('trace', on) requests
+    for the parent of a state, and ('stop', None).
+    """
+    index = goal_state.index
+    goal = goal_state.on
+    delta = heuristic_delta(heuristic)
+    inbox = inboxes[rank]
+    frontier = []  # Priority queue of (f, h, g, on)
+    best_cost = {}  # Cheapest known path cost (g) of each owned state
+    parents = {}  # Owned state -> (parent on, action) of its cheapest known path
+    outboxes = [[] for _ in range(workers)]
+    expanded = generated = duplicates = 0
+    bound = UNBOUNDED
+    base = rank * COUNTERS
+
+    def insert(on, cost, h_value, parent, action):
+        nonlocal bound, duplicates
+        known_cost = best_cost.get(on)
+        if known_cost is not None and known_cost <= cost:
+            duplicates += 1
+            return
+        best_cost[on] = cost
+        parents[on] = (parent, action)
+        if on == goal:
+            with upper_bound.get_lock():
+                if cost < upper_bound.value:
+                    upper_bound.value = cost
+                bound = upper_bound.value
+        else:
+            heapq.heappush(frontier, (cost + h_value, h_value, cost, on))
+
+    def flush(destination):
+        sent[rank] += 1  # Counted before it can be received
+        inboxes[destination].put(("nodes", outboxes[destination]))
+        outboxes[destination] = []
+
+    while True:
+        # Work is only left if an open state could still lead to a plan cheaper than the best one found
+        bound = upper_bound.value
+        busy = bool(frontier) and frontier[0][0] < bound
+        if not busy:
+            for destination in range(workers):
+                if outboxes[destination]:
+                    flush(destination)
+            counters[base + FRONTIER] = len(frontier)
+            counters[base + CLOSED] = len(best_cost)
+            idle[rank] = 1
+        try:
+            kind, payload = inbox.get(timeout=0.01) if not busy else inbox.get_nowait()
+        except queue.Empty:
+            kind = None
+        if kind is not None:
+            idle[rank] = 0
+            if kind == "stop":
+                for other in inboxes:
+                    other.cancel_join_thread()  # Batches nobody will read must not block the exit
+                return
+            if kind == "trace":
+                replies.put(parents[payload])
+                continue
+            for node in payload:
+                insert(*node)
+            received[rank] += 1  # Only once the batch is in the open list
+            continue
+        if not busy:
+            continue
+
+        for _ in range(EXPANSION_CHUNK):
+            if not frontier or frontier[0][0] >= bound:
+                break
+            _, current_h, cost, on = heapq.heappop(frontier)
+            if cost > best_cost[on]:
+                continue  # Superseded by a cheaper path found after it was pushed
+            expanded += 1
+            current_state = PackedState(on, index)
+            child_cost = cost + 1
+            for action in successors(current_state):
+                child = apply_move(current_state, action)
+                generated += 1
+                if delta:
+                    h_value = delta(current_h, current_state, action, goal_state)
+                else:
+                    h_value = heuristic(child, goal_state)
+                if child_cost + h_value >= bound:
+                    continue  # Cannot lead to a cheaper plan
+                destination = owner(child.on, workers)
+                if destination == rank:
+                    insert(child.on, child_cost, h_value, on, action)
+                else:
+                    outboxes[destination].append((child.on, child_cost, h_value, on, action))
+                    if len(outboxes[destination]) >= batch_size:
+                        flush(destination)
+        counters[base + EXPANDED] = expanded
+        counters[base + GENERATED] = generated
+        counters[base + DUPLICATES] = duplicates
@@ -1,97 +1,210 @@
 import heapq
+from functools import lru_cache
 
-from blocks_world.graph import generate_neighbors
+from blocks_world.batch_heuristics import BATCH_AVAILABLE, BATCH_MIN_BLOCKS, deadlock_batch, \
+    misplaced_blocks_batch, well_placed_batch
+from blocks_world.graph import successors, apply_move
+from blocks_world.instrumentation import instrument, next_report
+from blocks_world.pattern_database import pattern_database
+from blocks_world.state import TABLE_ID
 from blocks_world.utils import reconstruct_path
 
-import heapq
-
 
-def best_first_search(initial_state, goal_state, heuristic):
+def best_first_search(initial_state, goal_state, heuristic, stats=None, deadline=None):
     """
     Best-First Search algorithm.
-    :param initial_state: Initial BlockWorldState.
-    :param goal_state: Goal BlockWorldState.
+    :param initial_state: Initial PackedState.
+    :param goal_state: Goal PackedState.
     :param heuristic: Heuristic function to guide the search.
+                      If it has a 'delta' attribute, children are evaluated incrementally (see heuristic_delta),
+                      otherwise all children of an expansion at once if it has a 'batch' one (see heuristic_batch).
+    :param stats: Optional SearchStats object collecting counters and timings.
+    :param deadline: Optional Deadline checked once per expansion.
     :return: Solution path and nodes explored.
     """
-    frontier = []
-    heapq.heappush(frontier, (heuristic(initial_state, goal_state), initial_state))
-    explored = set()
-    prev = {initial_state: None}  # Map to track the predecessor of each state
-    moves = {initial_state: None}  # Map to track the move leading to each state
-    nodes_explored = 0
+    batch = heuristic_batch(heuristic, goal_state)
+    expand, materialise, heuristic, delta = instrument(stats, successors, apply_move, heuristic,
+                                                       heuristic_delta(heuristic))
+    if batch and stats is not None:
+        batch = stats.timed("heuristic", batch)
+    # Entries are (h, parent, action, state). With a delta heuristic the state is left as None and only
+    # materialised when the entry is popped, so children that are never selected are never built.
+    frontier = [(heuristic(initial_state, goal_state), None, None, initial_state)]
+    prev = {}  # Map to track the predecessor of each expanded state
+    moves = {}  # Map to track the move leading to each expanded state
+    children = []  # (action, neighbor) pairs of the current expansion awaiting batched evaluation
+    nodes_explored = generated = duplicates = 0
+    report_at = next_report(stats)
 
-    while frontier:
-        # Pop the state with the lowest heuristic value
-        _, current_state = heapq.heappop(frontier)
-        nodes_explored += 1
+    try:
+        while frontier:
+            # Pop the state with the lowest heuristic value
+            current_h, parent, action, current_state = heapq.heappop(frontier)
+            if current_state is None:
+                current_state = materialise(parent, action)
+            if current_state in prev:
+                duplicates += 1
+                continue  # Already expanded through another parent
 
-        # Check if the goal state is reached
-        if current_state == goal_state:
-            return reconstruct_path(prev, moves, initial_state, current_state), nodes_explored
+            prev[current_state] = parent  # Track the predecessor
+            moves[current_state] = action  # Track the move leading to this state
+            nodes_explored += 1
+            if nodes_explored == report_at:
+                stats.record(nodes_explored, generated, duplicates, len(frontier), len(prev))
+                report_at += stats.progress_interval
+            if deadline is not None:
+                deadline.check()
 
-        explored.add(current_state)
+            # Check if the goal state is reached
+            if current_state == goal_state:
+                return reconstruct_path(prev, moves, initial_state, current_state), nodes_explored
 
-        # Expand neighbors
-        for neighbor in generate_neighbors(current_state):
-            if neighbor not in explored:
-                h_value = heuristic(neighbor, goal_state)
-                heapq.heappush(frontier, (h_value, neighbor))
-                prev[neighbor] = current_state  # Track the predecessor
-                moves[neighbor] = neighbor.action  # Track the move leading to this state
+            # Expand neighbors
+            for action in expand(current_state):
+                generated += 1
+                if delta:
+                    h_value = delta(current_h, current_state, action, goal_state)
+                    heapq.heappush(frontier, (h_value, current_state, action, None))
+                else:
+                    neighbor = materialise(current_state, action)
+                    if neighbor in prev:
+                        duplicates += 1
+                    elif batch:
+                        children.append((action, neighbor))
+                    else:
+                        heapq.heappush(frontier, (heuristic(neighbor, goal_state), current_state, action, neighbor))
+            if children:
+                h_values = batch([neighbor for _, neighbor in children], goal_state)
+                for (action, neighbor), h_value in zip(children, h_values):
+                    heapq.heappush(frontier, (h_value, current_state, action, neighbor))
+                children = []
 
-    # If no solution is found
-    return None, nodes_explored
+        # If no solution is found
+        return None, nodes_explored
+    finally:
+        if stats is not None:
+            stats.record(nodes_explored, generated, duplicates, len(frontier), len(prev))
 
 
-def a_star_search(initial_state, goal_state, heuristic):
+def a_star_search(initial_state, goal_state, heuristic, upper_bound=None, stats=None, deadline=None):
     """
     A* search algorithm.
-    :param initial_state: Initial BlockWorldState.
-    :param goal_state: Goal BlockWorldState.
+    Keeps the best known path cost (g) of every generated state and only pushes a child when it improves on it.
+    Heap entries made obsolete by a cheaper path are skipped when popped (lazy deletion), and ties on f are
+    broken in favour of the lower heuristic value.
+    :param initial_state: Initial PackedState.
+    :param goal_state: Goal PackedState.
     :param heuristic: Heuristic function to guide the search.
+                      If it has a 'delta' attribute, children are evaluated incrementally (see heuristic_delta),
+                      otherwise all children of an expansion at once if it has a 'batch' one (see heuristic_batch).
+    :param upper_bound: Optional length of a known plan (e.g. from towers.tower_plan); with an admissible
+                        heuristic, children whose f exceeds it are never pushed.
+    :param stats: Optional SearchStats object collecting counters and timings.
+    :param deadline: Optional Deadline checked once per expansion.
     :return: Solution path and nodes explored.
     """
-    frontier = []  # Priority queue for A*
-    heapq.heappush(frontier, (0, initial_state))  # Push (f, state)
+    batch = heuristic_batch(heuristic, goal_state)
+    expand, materialise, heuristic, delta = instrument(stats, successors, apply_move, heuristic,
+                                                       heuristic_delta(heuristic))
+    if batch and stats is not None:
+        batch = stats.timed("heuristic", batch)
+    h_value = heuristic(initial_state, goal_state)
+    f_limit = upper_bound if upper_bound is not None else float("inf")
+    frontier = [(h_value, h_value, 0, initial_state)]  # Priority queue of (f, h, g, state)
     prev = {initial_state: None}  # Track predecessors
     moves = {initial_state: None}  # Track moves
-    explored = set()
-    nodes_explored = 0
+    best_cost = {initial_state: 0}  # Cheapest known path cost (g) of each generated state
+    nodes_explored = generated = duplicates = reopened = 0
+    report_at = next_report(stats)
+
+    try:
+        while frontier:
+            _, current_h, cost, current_state = heapq.heappop(frontier)
+
+            # Skip entries superseded by a cheaper path found after they were pushed
+            if cost > best_cost[current_state]:
+                continue
+            nodes_explored += 1
+            if nodes_explored == report_at:
+                stats.record(nodes_explored, generated, duplicates, len(frontier), len(best_cost), reopened)
+                report_at += stats.progress_interval
+            if deadline is not None:
+                deadline.check()
 
-    while frontier:
-        _, current_state = heapq.heappop(frontier)
-        nodes_explored += 1
+            if current_state == goal_state:
+                return reconstruct_path(prev, moves, initial_state, current_state), nodes_explored
 
-        if current_state == goal_state:
-            return reconstruct_path(prev, moves, initial_state, current_state), nodes_explored
+            child_cost = cost + 1
+            children = []  # (action, child, known cost) of the children improving on their known path cost
+            for action in expand(current_state):
+                child = materialise(current_state, action)
+                generated += 1
+                known_cost = best_cost.get(child)
+                if known_cost is not None and known_cost <= child_cost:
+                    duplicates += 1
+                    continue
+                children.append((action, child, known_cost))
 
-        explored.add(current_state)
+            if delta:
+                h_values = [delta(current_h, current_state, action, goal_state) for action, _, _ in children]
+            elif batch and children:
+                h_values = batch([child for _, child, _ in children], goal_state)
+            else:
+                h_values = [heuristic(child, goal_state) for _, child, _ in children]
+            for (action, child, known_cost), h_value in zip(children, h_values):
+                if child_cost + h_value > f_limit:
+                    continue  # Cannot beat the known plan
 
-        for child in generate_neighbors(current_state):
-            if child not in explored:
-                child.cost = current_state.cost + 1
-                child.f = child.cost + heuristic(child, goal_state)  # f = g + h
+                if known_cost is not None:
+                    reopened += 1
+                best_cost[child] = child_cost
 
                 # Track the move leading to this state
                 prev[child] = current_state
-                moves[child] = child.action  # Store the action leading to this state
+                moves[child] = action  # Store the action leading to this state
+                heapq.heappush(frontier, (child_cost + h_value, h_value, child_cost, child))  # f = g + h
+
+        return None, nodes_explored
+    finally:
+        if stats is not None:
+            stats.record(nodes_explored, generated, duplicates, len(frontier), len(best_cost), reopened)
+
+
+def heuristic_delta(heuristic):
+    """
+    Return the incremental form of a heuristic, or None if it only supports full evaluation.
+    A delta function has the signature delta(parent_h, parent_state, action, goal_state) and returns the
+    heuristic value of the child reached from parent_state by the (block, from, to) action in O(1).
+    :param heuristic: Heuristic function.
+    :return: The delta function attached to the heuristic, or None.
+    """
+    return getattr(heuristic, "delta", None)
 
-                heapq.heappush(frontier, (child.f, child))
 
-    return None, nodes_explored
+def heuristic_batch(heuristic, goal_state):
+    """
+    Return the batched form of a heuristic, or None if it has none or batching does not pay off for the problem.
+    A batch function has the signature batch(states, goal_state) and returns the list of the heuristic values
+    of the states, computed in one vectorized pass (see batch_heuristics; needs NumPy).
+    :param heuristic: Heuristic function.
+    :param goal_state: Goal PackedState.
+    :return: The batch function attached to the heuristic, or None.
+    """
+    if len(goal_state.on) < BATCH_MIN_BLOCKS:
+        return None
+    return getattr(heuristic, "batch", None)
 
 
 def misplaced_blocks_heuristic(state, goal_state):
     """
     Count the number of misplaced blocks compared to the goal state.
-    :param state: Current BlockWorldState.
-    :param goal_state: Goal BlockWorldState.
+    :param state: Current PackedState.
+    :param goal_state: Goal PackedState.
     :return: Number of misplaced blocks.
     """
     misplaced = 0
-    for block, goal_block in goal_state.on.items():
-        if state.on.get(block) != goal_block:
+    for current_block, goal_block in zip(state.on, goal_state.on):
+        if goal_block != TABLE_ID and current_block != goal_block:
             misplaced += 1
     return misplaced
 
@@ -99,14 +212,166 @@ def misplaced_blocks_heuristic(state, goal_state):
 def distance_to_goal_heuristic(state, goal_state):
     """
     Compute the total number of moves required to place each block in its correct position.
-    :param state: Current BlockWorldState.
-    :param goal_state: Goal BlockWorldState.
+    :param state: Current PackedState.
+    :param goal_state: Goal PackedState.
     :return: Total estimated cost to reach the goal.
     """
     distance = 0
-    for block, goal_block in goal_state.on.items():
+    for current_pos, goal_block in zip(state.on, goal_state.on):
         # If the block is not in the correct position
-        current_pos = state.on.get(block, "TABLE")
-        if current_pos != goal_block:
+        if goal_block != TABLE_ID and current_pos != goal_block:
             distance += 1  # One move needed to fix the block
     return distance
+
+
+def misplaced_blocks_delta(parent_h, parent_state, action, goal_state):
+    """
+    Update misplaced_blocks_heuristic after a move: only the moved block can change its status.
+    :param parent_h: Heuristic value of the parent state.
+    :param parent_state: Parent PackedState.
+    :param action: (block, from, to) move applied to the parent.
+    :param goal_state: Goal PackedState.
+    :return: Heuristic value of the child state.
+    """
+    block, from_location, to_location = action
+    goal_block = goal_state.on[block]
+    if goal_block == TABLE_ID:
+        return parent_h
+    return parent_h + (to_location != goal_block) - (from_location != goal_block)
+
+
+misplaced_blocks_heuristic.delta = misplaced_blocks_delta
+distance_to_goal_heuristic.delta = misplaced_blocks_delta  # Both count the blocks not on their goal block
+
+
+class GoalTowers:
+    """
+    Goal tower structure of a problem, precomputed once per goal state.
+    """
+
+    __slots__ = ("support", "below")
+
+    def __init__(self, goal_state):
+        """
+        Initialize the structure.
+        :param goal_state: Goal PackedState.
+        """
+        self.support = goal_state.on  # What each block sits on in the goal
+        self.below = [None] * len(goal_state.on)  # Bitmask of the blocks below each block in its goal tower
+
+        for block in range(len(self.support)):
+            # Walk down to the nearest block whose mask is known, then fill the masks back up
+            chain = []
+            while block != TABLE_ID and self.below[block] is None:
+                chain.append(block)
+                block = self.support[block]
+            mask = 0 if block == TABLE_ID else self.below[block] | (1 << block)
+            for block in reversed(chain):
+                self.below[block] = mask
+                mask |= 1 << block
+
+
+@lru_cache(maxsize=16)
+def goal_towers(goal_state):
+    """
+    Return the (cached) GoalTowers of a goal state.
+    """
+    return GoalTowers(goal_state)
+
+
+def _tower_counts(state, goal_state):
+    """
+    Walk the towers of a state bottom-up and classify its blocks against the goal towers.
+    A block is well-placed if it sits on its goal support and everything below it is well-placed;
+    every other block has to move at least once. A misplaced block has to move at least twice if
+    a misplaced block of its goal tower, or its goal support, lies below it but not directly under it,
+    since it cannot reach its final position before that part of the tower is taken apart.
+    :param state: Current PackedState.
+    :param goal_state: Goal PackedState.
+    :return: A tuple of (number of misplaced blocks, number of those that must move twice).
+    """
+    towers = goal_towers(goal_state)
+    goal_support = towers.support
+    goal_below = towers.below
+    on = state.on
+
+    above = {}
+    for block, below in enumerate(on):
+        if below != TABLE_ID:
+            above[below] = block
+
+    misplaced = 0
+    twice = 0
+    for bottom, below in enumerate(on):
+        if below != TABLE_ID:
+            continue
+
+        block = bottom
+        well_placed = True
+        below_mask = 0  # Blocks below the current one
+        misplaced_mask = 0  # Misplaced blocks below the current one
+        while block is not None:
+            support = on[block]
+            well_placed = well_placed and support == goal_support[block]
+            if not well_placed:
+                misplaced += 1
+                target = goal_support[block]
+                if goal_below[block] & misplaced_mask or \
+                        (target != TABLE_ID and target != support and below_mask >> target & 1):
+                    twice += 1
+                misplaced_mask |= 1 << block
+            below_mask |= 1 << block
+            block = above.get(block)
+
+    return misplaced, twice
+
+
+def well_placed_heuristic(state, goal_state):
+    """
+    Count the blocks that are not well-placed, i.e. not on top of a goal-consistent tower (admissible).
+    :param state: Current PackedState.
+    :param goal_state: Goal PackedState.
+    :return: Number of blocks that must move at least once.
+    """
+    misplaced, _ = _tower_counts(state, goal_state)
+    return misplaced
+
+
+def deadlock_heuristic(state, goal_state):
+    """
+    Count the blocks that are not well-placed plus the blocks that must move twice (admissible).
+    :param state: Current PackedState.
+    :param goal_state: Goal PackedState.
+    :return: Lower bound on the number of moves to the goal.
+    """
+    misplaced, twice = _tower_counts(state, goal_state)
+    return misplaced + twice
+
+
+def pattern_database_heuristic(state, goal_state):
+    """
+    Sum of the exact distances of disjoint goal-tower patterns (see PatternDatabase), combined by max with
+    deadlock_heuristic: both are admissible, so their maximum is too. The patterns capture every interaction
+    between the blocks of a pattern, while the deadlock count sees whole towers.
+    Pattern tables are built on first use and memory-mapped from ./data/pdb afterwards.
+    :param state: Current PackedState.
+    :param goal_state: Goal PackedState.
+    :return: Lower bound on the number of moves to the goal.
+    """
+    return max(pattern_database(goal_state).evaluate(state), deadlock_heuristic(state, goal_state))
+
+
+if BATCH_AVAILABLE:
+    misplaced_blocks_heuristic.batch = misplaced_blocks_batch
+    distance_to_goal_heuristic.batch = misplaced_blocks_batch
+    well_placed_heuristic.batch = well_placed_batch
+    deadlock_heuristic.batch = deadlock_batch
+
+# Heuristics selectable by name (command line, benchmarks)
+HEURISTICS = {
+    "misplaced": misplaced_blocks_heuristic,
+    "distance": distance_to_goal_heuristic,
+    "wellplaced": well_placed_heuristic,
+    "deadlock": deadlock_heuristic,
+    "pdb": pattern_database_heuristic,
+}
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+
+from blocks_world.graph import successors, apply_move
+from blocks_world.heuristic_search import heuristic_delta
+from blocks_world.instrumentation import instrument
+
+
+def ida_star_search(initial_state, goal_state, heuristic, table_size=0, stats=None, deadline=None):
+    """
+    Iterative-deepening A* (IDA*) search algorithm.
+    Runs depth-first searches bounded by f = g + h, raising the bound to the smallest f that exceeded it,
+    so memory grows with the solution depth only.
+    :param initial_state: Initial PackedState.
+    :param goal_state: Goal PackedState.
+    :param heuristic: Admissible heuristic function to guide the search.
+    :param table_size: Maximum number of entries of the transposition table (least recently used entries
+                       are evicted first), or 0 to disable it. The table prunes states reached again with
+                       no smaller path cost during the same iteration.
+    :param stats: Optional SearchStats object collecting counters and timings (summed over all iterations).
+    :param deadline: Optional Deadline checked once per expansion.
+    :return: Solution path and nodes explored.
+    """
+    if initial_state == goal_state:
+        return [], 1
+
+    functions = instrument(stats, successors, apply_move, heuristic, heuristic_delta(heuristic))
+    initial_h = functions[2](initial_state, goal_state)
+    bound = initial_h
+    counters = [0, 0, 0]  # Expanded, generated and duplicate states over all iterations
+
+    while True:
+        solution, next_bound = _bounded_search(initial_state, initial_h, goal_state, functions, bound, table_size,
+                                               counters, stats, deadline)
+        if solution is not None:
+            index = goal_state.index
+            return [index.format_move(action) for action in solution], counters[0]
+        if next_bound is None:
+            return None, counters[0]  # The whole reachable space fits under the bound
+        bound = next_bound
+
+
+def _bounded_search(initial_state, initial_h, goal_state, functions, bound, table_size, counters, stats, deadline):
+    """
+    Depth-first search of the states whose f value does not exceed the bound.
+    :param functions: (successors, apply_move, heuristic, delta) tuple returned by instrument().
+    :param counters: [expanded, generated, duplicates] list, updated in place.
+    :return: A tuple of (list of (block, from, to) actions or None, next bound or None).
+    """
+    expand, materialise, heuristic, delta = functions
+    stack = [(initial_state, initial_h, iter(expand(initial_state)))]  # One entry per state on the current path
+    path = []  # Actions along the current path
+    on_path = {initial_state}  # Prevents cycles along the current path
+    table = OrderedDict() if table_size else None  # Transposition table: state -> smallest g seen
+    next_bound = None
+    expanded, generated, duplicates = counters
+    expanded += 1
+    report_at = (expanded // stats.progress_interval + 1) * stats.progress_interval if stats is not None else 0
+
+    try:
+        while stack:
+            current_state, current_h, actions = stack[-1]
+            action = next(actions, None)
+            if action is None:
+                # Every move has been tried: backtrack
+                stack.pop()
+                on_path.discard(current_state)
+                if path:
+                    path.pop()
+                continue
+
+            generated += 1
+            cost = len(stack)  # Path cost (g) of the child
+            child = None
+            if delta:
+                child_h = delta(current_h, current_state, action, goal_state)
+            else:
+                child = materialise(current_state, action)
+                child_h = heuristic(child, goal_state)
+
+            f = cost + child_h
+            if f > bound:
+                if next_bound is None or f < next_bound:
+                    next_bound = f
+                continue
+
+            if child is None:
+                child = materialise(current_state, action)
+            if child in on_path:
+                duplicates += 1
+                continue
+            if child == goal_state:
+                return path + [action], None
+
+            if table is not None:
+                seen_cost = table.get(child)
+                if seen_cost is not None and seen_cost <= cost:
+                    table.move_to_end(child)
+                    duplicates += 1
+                    continue
+                table[child] = cost
+                table.move_to_end(child)
+                if len(table) > table_size:
+                    table.popitem(last=False)
+
+            on_path.add(child)
+            path.append(action)
+            stack.append((child, child_h, iter(expand(child))))
+            expanded += 1
+            if expanded == report_at:
+                stats.record(expanded, generated, duplicates, len(stack), len(table) if table is not None else 0)
+                report_at += stats.progress_interval
+            if deadline is not None:
+                deadline.check()
+
+        return None, next_bound
+    finally:
+        counters[:] = expanded, generated, duplicates
+        if stats is not None:
+            stats.record(expanded, generated, duplicates, len(stack), len(table) if table is not None else 0)
@@ -0,0 +1,111 @@
+import time
+
+
+class SearchStats:
+    """
+    Counters and profile of one search run.
+    Pass an instance as the 'stats' argument of a solver; solvers keep their counters in local variables and
+    only write them here every 'progress_interval' expansions and when they stop (including on a timeout),
+    so a search without stats pays for nothing but an integer comparison per expansion.
+    """
+
+    def __init__(self, profile=False, progress=None, progress_interval=10000):
+        """
+        Initialize the statistics.
+        :param profile: Whether to time successor generation, heuristic evaluation and state hashing.
+                        Profiling wraps those calls with timers and does slow the search down.
+        :param progress: Optional callback called with this object every 'progress_interval' expansions.
+        :param progress_interval: Number of expansions between two samples (and progress callbacks).
+        """
+        self.expanded = 0  # States taken from the frontier and expanded
+        self.generated = 0  # Children produced by expansions
+        self.duplicates = 0  # Children discarded because their state had already been seen
+        self.reopened = 0  # Known states pushed again because a cheaper path was found (A*)
+        self.frontier_size = 0
+        self.closed_size = 0
+        self.max_frontier_size = 0
+        self.samples = []  # (elapsed seconds, expanded, generated, frontier size, closed-set size)
+        self.profile = profile
+        # Seconds spent per category; "hashing" covers building child states, whose hash is computed on creation
+        self.timings = {"successors": 0.0, "heuristic": 0.0, "hashing": 0.0}
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.start_time = time.perf_counter()
+
+    def record(self, expanded, generated, duplicates, frontier_size, closed_size, reopened=0):
+        """
+        Store the current counters of a search, add a sample and call the progress callback.
+        """
+        self.expanded = expanded
+        self.generated = generated
+        self.duplicates = duplicates
+        self.reopened = reopened
+        self.frontier_size = frontier_size
+        self.closed_size = closed_size
+        self.max_frontier_size = max(self.max_frontier_size, frontier_size)
+        self.samples.append((self.elapsed(), expanded, generated, frontier_size, closed_size))
+        if self.progress is not None:
+            self.progress(self)
+
+    def elapsed(self):
+        """
+        Return the number of seconds since the statistics were created.
+        """
+        return time.perf_counter() - self.start_time
+
+    def timed(self, category, function):
+        """
+        Return the function unchanged, or wrapped so that its run time is added to timings[category]
+        when profiling is enabled.
+        """
+        if not self.profile:
+            return function
+        timings = self.timings
+
+        def timed_function(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                timings[category] += time.perf_counter() - start
+
+        return timed_function
+
+    def timed_successors(self, successors):
+        """
+        Like timed(), for a successor generator: when profiling, moves are collected eagerly so that
+        the time spent generating them is measured.
+        """
+        if not self.profile:
+            return successors
+        return self.timed("successors", lambda state: list(successors(state)))
+
+    def summary(self):
+        """
+        Return a one-line, human-readable summary.
+        """
+        text = (f"expanded={self.expanded} generated={self.generated} duplicates={self.duplicates} "
+                f"reopened={self.reopened} frontier={self.frontier_size} (max {self.max_frontier_size}) "
+                f"closed={self.closed_size} elapsed={self.elapsed():.3f}s")
+        if self.profile:
+            text += " " + " ".join(f"{category}={seconds:.3f}s" for category, seconds in self.timings.items())
+        return text
+
+
+def instrument(stats, successors, apply_move, heuristic=None, delta=None):
+    """
+    Return the (possibly timed) versions of the hot-path functions of a solver.
+    :param stats: SearchStats object or None.
+    :return: A tuple of (successors, apply_move, heuristic, delta).
+    """
+    if stats is None or not stats.profile:
+        return successors, apply_move, heuristic, delta
+    return (stats.timed_successors(successors), stats.timed("hashing", apply_move),
+            heuristic and stats.timed("heuristic", heuristic), delta and stats.timed("heuristic", delta))
+
+
+def next_report(stats):
+    """
+    Return the expansion count at which a solver should first call stats.record(), or 0 (never) without stats.
+    """
+    return stats.progress_interval if stats is not None else 0
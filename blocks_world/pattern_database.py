@@ -0,0 +1,198 @@
+import hashlib
+import mmap
+import os
+from collections import deque
+from functools import lru_cache
+
+from blocks_world.state import TABLE_ID
+
+PATTERN_SIZE = 6  # Blocks per pattern; a table has (PATTERN_SIZE + 2) ** PATTERN_SIZE one-byte entries
+PDB_DIRECTORY = os.path.join(".", "data", "pdb")  # Where pattern tables are stored between runs
+MAGIC = b"BWPDB\x01"
+UNREACHED = 0xFF
+
+
+class PatternDatabase:
+    """
+    Additive pattern database of a goal state.
+    The blocks are partitioned into disjoint patterns of at most PATTERN_SIZE blocks, cut from the goal towers
+    bottom-up so that goal relations stay inside a pattern. In the abstraction of a pattern only its blocks
+    exist: each one sits on another pattern block, on the table, or on 'another' (any block outside the
+    pattern). Every concrete move is either a move of one pattern block in exactly one abstraction or a no-op
+    in it, so the exact abstract distances of all patterns can be summed and stay admissible.
+    """
+
+    def __init__(self, goal_state, pattern_size=PATTERN_SIZE, directory=PDB_DIRECTORY):
+        """
+        Initialize the database, loading or building the table of every pattern.
+        :param goal_state: Goal PackedState.
+        :param pattern_size: Maximum number of blocks per pattern.
+        :param directory: Directory of the table files (None keeps the tables in memory only).
+        """
+        goal = goal_state.on
+        self.patterns = partition_goal_towers(goal, pattern_size)
+        self.pattern_of = [0] * len(goal)
+        for number, pattern in enumerate(self.patterns):
+            for block in pattern:
+                self.pattern_of[block] = number
+
+        # contributions[block][support] is the term added to the code of the block's pattern when it sits there
+        self.contributions = []
+        for block in range(len(goal)):
+            pattern = self.patterns[self.pattern_of[block]]
+            self.contributions.append(_contributions(pattern, pattern.index(block)))
+        self.tables = [load_table(_pattern_goal(pattern, goal), directory)
+                       for pattern in self.patterns]
+
+    def evaluate(self, state):
+        """
+        Return the sum of the abstract distances of all patterns.
+        """
+        codes = [0] * len(self.patterns)
+        pattern_of = self.pattern_of
+        contributions = self.contributions
+        for block, support in enumerate(state.on):
+            codes[pattern_of[block]] += contributions[block][support]
+        return sum(table[code] for table, code in zip(self.tables, codes))
+
+
+def partition_goal_towers(goal, pattern_size):
+    """
+    Split the goal towers into disjoint patterns of at most pattern_size blocks.
+    Towers are cut bottom-up into consecutive segments; segments shorter than pattern_size are then packed
+    together (first fit, largest first) so that small towers and table blocks share patterns.
+    :param goal: Packed goal 'on' bytes.
+    :return: List of patterns, each a list of block ids ordered bottom-up within its segments.
+    """
+    above = {support: block for block, support in enumerate(goal) if support != TABLE_ID}
+    segments = []
+    for bottom, support in enumerate(goal):
+        if support != TABLE_ID:
+            continue
+        tower = []
+        block = bottom
+        while block is not None:
+            tower.append(block)
+            block = above.get(block)
+        segments.extend(tower[start:start + pattern_size] for start in range(0, len(tower), pattern_size))
+
+    patterns = []
+    for segment in sorted(segments, key=len, reverse=True):
+        for pattern in patterns:
+            if len(pattern) + len(segment) <= pattern_size:
+                pattern.extend(segment)
+                break
+        else:
+            patterns.append(list(segment))
+    return patterns
+
+
+def _contributions(pattern, position):
+    """
+    Return the code contribution of a pattern block for every possible support id (0-255).
+    Digits are the position of the supporting pattern block, len(pattern) for the table and
+    len(pattern) + 1 for a block outside the pattern.
+    """
+    size = len(pattern)
+    weight = (size + 2) ** position
+    digits = [size + 1] * 256
+    digits[TABLE_ID] = size
+    for local, block in enumerate(pattern):
+        digits[block] = local
+    return [digit * weight for digit in digits]
+
+
+def _pattern_goal(pattern, goal):
+    """
+    Return the abstract goal of a pattern as a tuple of digits.
+    """
+    size = len(pattern)
+    local = {block: position for position, block in enumerate(pattern)}
+    digits = []
+    for block in pattern:
+        support = goal[block]
+        if support == TABLE_ID:
+            digits.append(size)
+        elif support in local:
+            digits.append(local[support])
+        else:
+            digits.append(size + 1)
+    return tuple(digits)
+
+
+def build_table(goal_digits):
+    """
+    Compute the exact distance of every abstract state to the abstract goal by breadth-first search.
+    Moves are reversible, so searching forward from the goal yields the distances to it.
+    :param goal_digits: Abstract goal, one digit per pattern block.
+    :return: bytearray of (size + 2) ** size distances indexed by state code (UNREACHED for invalid codes).
+    """
+    size = len(goal_digits)
+    base = size + 2
+    table_digit, other_digit = size, size + 1
+    weights = [base ** position for position in range(size)]
+    table = bytearray([UNREACHED]) * base ** size
+
+    goal_code = sum(digit * weight for digit, weight in zip(goal_digits, weights))
+    table[goal_code] = 0
+    queue = deque([(goal_digits, goal_code)])
+    while queue:
+        digits, code = queue.popleft()
+        distance = table[code] + 1
+        clear = [block for block in range(size) if block not in digits]
+        for block in clear:
+            current = digits[block]
+            targets = [other for other in clear if other != block]
+            if current != table_digit:
+                targets.append(table_digit)
+            if current != other_digit:
+                targets.append(other_digit)
+            for target in targets:
+                child_code = code + (target - current) * weights[block]
+                if table[child_code] == UNREACHED:
+                    table[child_code] = distance
+                    child = digits[:block] + (target,) + digits[block + 1:]
+                    queue.append((child, child_code))
+    return table
+
+
+def load_table(goal_digits, directory=PDB_DIRECTORY):
+    """
+    Return the table of an abstract goal, memory-mapped from its file, building and saving it first if needed.
+    Tables only depend on the abstract goal, so problems sharing goal tower shapes share files.
+    :param goal_digits: Abstract goal, one digit per pattern block.
+    :param directory: Directory of the table files (None builds the table in memory).
+    :return: Read-only memoryview (or bytearray) indexed by state code.
+    """
+    if directory is None:
+        return build_table(goal_digits)
+
+    header = MAGIC + bytes((len(goal_digits),)) + bytes(goal_digits)
+    key = hashlib.sha1(header).hexdigest()[:16]
+    path = os.path.join(directory, f"{key}.pdb")
+    size = (len(goal_digits) + 2) ** len(goal_digits)
+
+    if os.path.exists(path) and os.path.getsize(path) == len(header) + size:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(header)] == header:
+            return memoryview(mapped)[len(header):]
+        mapped.close()
+
+    table = build_table(goal_digits)
+    os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(header)
+        f.write(table)
+    os.replace(temporary_path, path)  # Atomic, so concurrent solvers never read a partial file
+    return table
+
+
+@lru_cache(maxsize=16)
+def pattern_database(goal_state):
+    """
+    Return the (cached) PatternDatabase of a goal state.
+    """
+    return PatternDatabase(goal_state)
+
@@ -0,0 +1,180 @@
+from blocks_world.state import pair_key, TABLE
+
+
+class PlanError(ValueError):
+    """
+    Raised when a plan contains an illegal move or does not reach the goal.
+    """
+
+
+def parse_move(move):
+    """
+    Split a 'Move X from Y to Z' string into its (block, from, to) names.
+    """
+    parts = move.split()
+    if len(parts) != 6 or parts[0] != "Move" or parts[2] != "from" or parts[4] != "to":
+        raise PlanError(f"Malformed move {move!r}.")
+    return parts[1], parts[3], parts[5]
+
+
+def format_move(block, from_location, to_location):
+    """
+    Format a move as 'Move X from Y to Z'.
+    """
+    return f"Move {block} from {from_location} to {to_location}"
+
+
+class PlanSimulator:
+    """
+    Replays moves in place with the semantics of state.move(), checking each move's preconditions.
+    It also maintains the Zobrist key of the current 'on' relation (see BlockWorldState.zobrist_key), updated
+    in O(1) per move, so visited states can be recognised without hashing whole states.
+    """
+
+    def __init__(self, initial_state):
+        """
+        Initialize the simulator.
+        :param initial_state: Initial BlockWorldState (not modified).
+        """
+        self.on = dict(initial_state.on)
+        self.covered = set(self.on.values())
+        self.blocks = initial_state.clear | initial_state.onTable | set(self.on) | self.covered
+        self.key = initial_state.zobrist_key()
+
+    def apply(self, block, from_location, to_location):
+        """
+        Apply one move.
+        :raise PlanError: If the move is illegal in the current state.
+        """
+        if block not in self.blocks or (to_location != TABLE and to_location not in self.blocks):
+            raise PlanError("it mentions an unknown block")
+        if block in self.covered:
+            raise PlanError(f"{block} is not clear")
+        if self.on.get(block, TABLE) != from_location:
+            raise PlanError(f"{block} is not on {from_location}")
+        if to_location == block or to_location == from_location:
+            raise PlanError(f"{block} cannot move onto {to_location}")
+        if to_location != TABLE and to_location in self.covered:
+            raise PlanError(f"{to_location} is not clear")
+
+        if from_location != TABLE:
+            del self.on[block]
+            self.covered.discard(from_location)
+            self.key ^= pair_key(block, from_location)
+        if to_location != TABLE:
+            self.on[block] = to_location
+            self.covered.add(to_location)
+            self.key ^= pair_key(block, to_location)
+
+    def satisfies(self, goal_state):
+        """
+        Return True if the current state satisfies every ON, ONTABLE and CLEAR atom of the goal.
+        """
+        return all(self.on.get(block) == below for block, below in goal_state.on.items()) and \
+            all(block not in self.on for block in goal_state.onTable) and \
+            all(block not in self.covered for block in goal_state.clear)
+
+
+def validate_plan(initial_state, goal_state, plan):
+    """
+    Replay a plan from the initial state and check that every move is legal and the goal is reached.
+    :param initial_state: Initial BlockWorldState.
+    :param goal_state: Goal BlockWorldState.
+    :param plan: List of moves ('Move X from Y to Z').
+    :raise PlanError: Describing the first illegal move, or the unreached goal.
+    """
+    simulator = PlanSimulator(initial_state)
+    for number, move in enumerate(plan, start=1):
+        try:
+            simulator.apply(*parse_move(move))
+        except PlanError as e:
+            raise PlanError(f"Move {number} ({move}) is illegal: {e}.") from None
+    if not simulator.satisfies(goal_state):
+        raise PlanError("The plan does not reach the goal.")
+
+
+def remove_cycles(initial_state, plan):
+    """
+    Drop every part of a plan that leads back to a state visited before.
+    :param initial_state: Initial BlockWorldState.
+    :param plan: List of (block, from, to) moves.
+    :return: List of moves without revisited states.
+    """
+    simulator = PlanSimulator(initial_state)
+    visited = {simulator.key: 0}  # State hash -> length of the plan prefix reaching the state
+    keys = []  # keys[i] is the state hash after the first i + 1 moves of the result
+    result = []
+    for move in plan:
+        simulator.apply(*move)
+        length = visited.get(simulator.key)
+        if length is None:
+            result.append(move)
+            keys.append(simulator.key)
+            visited[simulator.key] = len(result)
+            continue
+        # Back to an earlier state: forget everything done since
+        for key in keys[length:]:
+            del visited[key]
+        del result[length:]
+        del keys[length:]
+        visited[simulator.key] = length
+    return result
+
+
+def merge_moves(plan):
+    """
+    Replace two moves of the same block by one: 'X from A to B' followed later by 'X from B to C' becomes
+    a single 'X from A to C' at the position of the second move, or disappears if C is A. This is legal
+    when no move in between moves A or puts a block on it: B stays covered by X in between, so nothing
+    else involves B, and postponing the first move only keeps A covered for longer.
+    :param plan: List of (block, from, to) moves.
+    :return: List of moves, repeated until no two moves can be merged.
+    """
+    plan = list(plan)
+    merged = True
+    while merged:
+        merged = False
+        last_move = {}  # Block -> position of its latest move
+        position = 0
+        while position < len(plan):
+            block, from_location, to_location = plan[position]
+            earlier = last_move.get(block)
+            if earlier is not None:
+                origin = plan[earlier][1]
+                if origin == TABLE or all(origin not in (moved, target) for moved, _, target in
+                                          plan[earlier + 1:position]):
+                    del plan[earlier]
+                    position -= 1
+                    if origin == to_location:
+                        del plan[position]
+                    else:
+                        plan[position] = (block, origin, to_location)
+                    merged = True
+                    last_move = {}  # Positions have shifted; rescan from the start
+                    position = 0
+                    continue
+            last_move[block] = position
+            position += 1
+    return plan
+
+
+def optimize_plan(initial_state, goal_state, plan):
+    """
+    Shorten a plan by removing cycles and merging moves of the same block, at a cost linear to quadratic
+    in the plan length. The result is validated; if the plan cannot be improved safely it is returned as is.
+    :param initial_state: Initial BlockWorldState.
+    :param goal_state: Goal BlockWorldState.
+    :param plan: Valid list of moves ('Move X from Y to Z').
+    :return: A valid plan no longer than the original.
+    """
+    moves = [parse_move(move) for move in plan]
+    length = None
+    while length != len(moves):
+        length = len(moves)
+        moves = merge_moves(remove_cycles(initial_state, moves))
+    optimized = [format_move(*move) for move in moves]
+    try:
+        validate_plan(initial_state, goal_state, optimized)
+    except PlanError:
+        return plan  # Only possible after a state hash collision
+    return optimized
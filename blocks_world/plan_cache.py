@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from blocks_world.plan import PlanError, validate_plan
+from blocks_world.state import TABLE
+
+CACHE_PATH = os.path.join(".", "data", "cache", "plans.sqlite")
+MAX_ENTRIES = 10000  # Least recently used plans beyond this are evicted
+SCHEMA_VERSION = 2  # Stored as the database's user_version; older caches are discarded
+
+# Neighbour kinds of a block; each block has at most one neighbour of each kind
+_KINDS = ("below", "above", "goal_below", "goal_above")
+
+
+class CanonicalProblem:
+    """
+    Block-renaming invariant form of a problem.
+    Each block has at most one neighbour below and above it in the initial state and in the goal, so a walk
+    from a chosen root block that visits neighbours in a fixed kind order numbers a whole connected component
+    deterministically. The canonical form of a component is the smallest encoding over its candidate roots,
+    where candidates are narrowed down to the smallest class of a Weisfeiler-Lehman colour refinement; the
+    problem's form is the sorted list of its component forms.
+    """
+
+    def __init__(self, initial_state, goal_state):
+        """
+        Initialize the canonical form.
+        :param initial_state: Initial BlockWorldState.
+        :param goal_state: Goal BlockWorldState.
+        """
+        blocks = sorted(initial_state.clear | initial_state.onTable | set(initial_state.on) |
+                        set(initial_state.on.values()) | goal_state.clear | goal_state.onTable |
+                        set(goal_state.on) | set(goal_state.on.values()))
+        neighbours = {block: dict.fromkeys(_KINDS) for block in blocks}
+        for block, below in initial_state.on.items():
+            neighbours[block]["below"] = below
+            neighbours[below]["above"] = block
+        for block, below in goal_state.on.items():
+            neighbours[block]["goal_below"] = below
+            neighbours[below]["goal_above"] = block
+        self.neighbours = neighbours
+
+        colours = _refine_colours(neighbours)
+        components = []
+        for component in _components(neighbours):
+            smallest = min(component, key=lambda block: (sum(colours[other] == colours[block]
+                                                               for other in component), colours[block]))
+            roots = [block for block in component if colours[block] == colours[smallest]]
+            components.append(min(self._walk(root) for root in roots))
+        components.sort()
+
+        self.names = []  # Canonical id -> block name
+        encoding = []
+        for code, order in components:
+            offset = len(self.names)
+            encoding.append([[-1 if number < 0 else number + offset for number in row] for row in code])
+            self.names.extend(order)
+        self.ids = {name: canonical_id for canonical_id, name in enumerate(self.names)}
+        self.fingerprint = hashlib.sha256(json.dumps(encoding).encode()).hexdigest()
+
+    def _walk(self, root):
+        """
+        Number a component breadth-first from a root block.
+        :return: A tuple of (encoding rows, blocks in numbering order).
+        """
+        neighbours = self.neighbours
+        number = {root: 0}
+        order = [root]
+        for block in order:  # The list grows while it is walked
+            for kind in _KINDS:
+                other = neighbours[block][kind]
+                if other is not None and other not in number:
+                    number[other] = len(order)
+                    order.append(other)
+        code = tuple(tuple(-1 if neighbours[block][kind] is None else number[neighbours[block][kind]]
+                           for kind in _KINDS) for block in order)
+        return code, order
+
+    def encode_plan(self, plan):
+        """
+        Translate a plan ('Move X from Y to Z' strings) into canonical [block, from, to] ids (-1 for the table).
+        """
+        moves = []
+        for move in plan:
+            _, block, _, from_location, _, to_location = move.split()
+            moves.append([self._id(block), self._id(from_location), self._id(to_location)])
+        return moves
+
+    def decode_plan(self, moves):
+        """
+        Translate canonical moves back into a plan over this problem's block names.
+        """
+        return [f"Move {self._name(block)} from {self._name(from_location)} to {self._name(to_location)}"
+                for block, from_location, to_location in moves]
+
+    def _id(self, name):
+        return -1 if name == TABLE else self.ids[name]
+
+    def _name(self, canonical_id):
+        return TABLE if canonical_id < 0 else self.names[canonical_id]
+
+
+def _refine_colours(neighbours):
+    """
+    Weisfeiler-Lehman colour refinement: repeatedly recolour each block by its colour and the colours of
+    its neighbours of every kind, until the number of colours stops growing.
+    :return: Dictionary mapping blocks to integer colours.
+    """
+    colours = dict.fromkeys(neighbours, 0)
+    count = 1
+    while True:
+        signatures = {block: (colours[block],) + tuple(-1 if other is None else colours[other]
+                                                       for other in links.values())
+                      for block, links in neighbours.items()}
+        palette = {signature: colour for colour, signature in enumerate(sorted(set(signatures.values())))}
+        colours = {block: palette[signature] for block, signature in signatures.items()}
+        if len(palette) == count:
+            return colours
+        count = len(palette)
+
+
+def _components(neighbours):
+    """
+    Yield the connected components of the block graph, as lists of blocks.
+    """
+    seen = set()
+    for start in neighbours:
+        if start in seen:
+            continue
+        seen.add(start)
+        component = [start]
+        for block in component:
+            for other in neighbours[block].values():
+                if other is not None and other not in seen:
+                    seen.add(other)
+                    component.append(other)
+        yield component
+
+
+class PlanCache:
+    """
+    Persistent plan cache (SQLite) keyed by canonical problem fingerprints, so renamed variants of a problem
+    share their plans. Each algorithm keeps its own plan of a problem, stored over canonical block ids with
+    its cost and whether it is optimal; plans are validated by replay before being returned.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        """
+        Open (or create) the cache.
+        :param path: SQLite database file.
+        :param max_entries: Number of plans kept; the least recently used ones are evicted.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        # Write-ahead logging without a sync per commit keeps lookups (which update the LRU time) cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.max_entries = max_entries
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS plans")  # One plan per problem: start over
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS plans (fingerprint TEXT NOT NULL, algorithm TEXT NOT NULL, "
+            "moves TEXT NOT NULL, optimal INTEGER NOT NULL, cost INTEGER NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (fingerprint, algorithm))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS plans_last_used ON plans (last_used)")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, initial_state, goal_state, algorithm, optimal=False):
+        """
+        Look up a plan for a problem.
+        :param initial_state: Initial BlockWorldState.
+        :param goal_state: Goal BlockWorldState.
+        :param algorithm: Name of the requesting algorithm; only the plans it found itself are returned, unless
+                          it is optimal.
+        :param optimal: Whether the requesting algorithm is optimal. It then accepts the optimal plan of any
+                        algorithm, since they all have the same cost.
+        :return: A tuple of (plan, algorithm, optimal) or None. Plans failing the replay check are dropped.
+        """
+        problem = CanonicalProblem(initial_state, goal_state)
+        if optimal:
+            row = self.connection.execute("SELECT moves, algorithm, optimal FROM plans WHERE fingerprint = ? AND "
+                                          "optimal = 1 ORDER BY algorithm != ? LIMIT 1",
+                                          (problem.fingerprint, algorithm)).fetchone()
+        else:
+            row = self.connection.execute("SELECT moves, algorithm, optimal FROM plans WHERE fingerprint = ? AND "
+                                          "algorithm = ?", (problem.fingerprint, algorithm)).fetchone()
+        if row is None:
+            return None
+
+        key = (problem.fingerprint, row[1])
+        plan = problem.decode_plan(json.loads(row[0]))
+        try:
+            validate_plan(initial_state, goal_state, plan)
+        except PlanError:
+            self.connection.execute("DELETE FROM plans WHERE fingerprint = ? AND algorithm = ?", key)
+            self.connection.commit()
+            return None
+        self.connection.execute("UPDATE plans SET last_used = ? WHERE fingerprint = ? AND algorithm = ?",
+                                (time.time(),) + key)
+        self.connection.commit()
+        return plan, row[1], bool(row[2])
+
+    def put(self, initial_state, goal_state, plan, algorithm, optimal=False):
+        """
+        Store an algorithm's plan, unless the cache already holds one of it that is at least as good.
+        :param initial_state: Initial BlockWorldState.
+        :param goal_state: Goal BlockWorldState.
+        :param plan: List of moves ('Move X from Y to Z').
+        :param algorithm: Name of the algorithm that found the plan.
+        :param optimal: Whether the plan is known to be optimal.
+        """
+        problem = CanonicalProblem(initial_state, goal_state)
+        row = self.connection.execute("SELECT optimal, cost FROM plans WHERE fingerprint = ? AND algorithm = ?",
+                                      (problem.fingerprint, algorithm)).fetchone()
+        if row is not None and (row[0] >= optimal and row[1] <= len(plan)):
+            return
+        self.connection.execute("INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?)",
+                                (problem.fingerprint, algorithm, json.dumps(problem.encode_plan(plan)),
+                                 int(optimal), len(plan), time.time()))
+        self.connection.execute("DELETE FROM plans WHERE rowid NOT IN "
+                                "(SELECT rowid FROM plans ORDER BY last_used DESC LIMIT ?)",
+                                (self.max_entries,))
+        self.connection.commit()
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import queue
+import time
+from functools import partial
+
+from blocks_world.bidirectional import bidirectional_solve
+from blocks_world.heuristic_search import a_star_search, best_first_search, deadlock_heuristic, \
+    distance_to_goal_heuristic
+from blocks_world.ida_star import ida_star_search
+from blocks_world.utils import Deadline, TimeoutException
+
+# (name, solve function) pairs raced by default; optimal solvers first, so they get a core on small machines
+DEFAULT_PORTFOLIO = (
+    ("astar-deadlock", partial(a_star_search, heuristic=deadlock_heuristic)),
+    ("ida-deadlock", partial(ida_star_search, heuristic=deadlock_heuristic, table_size=1_000_000)),
+    ("bidirectional", bidirectional_solve),
+    ("astar-distance", partial(a_star_search, heuristic=distance_to_goal_heuristic)),
+    ("best-deadlock", partial(best_first_search, heuristic=deadlock_heuristic)),
+)
+
+
+def portfolio_worker(name, solve_function, args, results, timeout):
+    """Standalone function running one portfolio configuration inside a separate process."""
+    try:
+        results.put((name, solve_function(*args, deadline=Deadline(timeout))))
+    except Exception as e:
+        results.put((name, e))
+
+
+def portfolio_solve(initial_state, goal_state, configurations=DEFAULT_PORTFOLIO, timeout=60, wait_for_best=False,
+                    max_workers=None):
+    """
+    Race several solver configurations in parallel processes.
+    :param initial_state: PackedState object representing the initial state.
+    :param goal_state: PackedState object representing the goal state.
+    :param configurations: Sequence of (name, solve function) pairs; each function is called as
+                           f(initial, goal, deadline=...) and must be picklable (module-level function or
+                           functools.partial).
+    :param timeout: Maximum time allowed (in seconds).
+    :param wait_for_best: If False return the first solution found, otherwise the shortest one found before the
+                          deadline (or once every configuration has finished).
+    :param max_workers: Maximum number of concurrent processes (defaults to the number of CPU cores). Remaining
+                        configurations start as soon as a process finishes.
+    :return: A tuple of (solution path as a list of moves, number of nodes explored by the chosen configuration).
+    """
+    deadline = time.monotonic() + timeout
+    max_workers = max_workers or os.cpu_count() or 1
+    pending = list(configurations)
+    running = {}  # Name -> process
+    results = multiprocessing.Queue()
+    best = None  # (solution, nodes explored, name)
+
+    try:
+        while pending or running:
+            # Keep every core busy while configurations are waiting
+            while pending and len(running) < max_workers:
+                name, solve_function = pending.pop(0)
+                # Workers stop on their own at the deadline; the ones still running when the race ends are killed
+                process = multiprocessing.Process(target=portfolio_worker,
+                                                  args=(name, solve_function, (initial_state, goal_state), results,
+                                                        deadline - time.monotonic()),
+                                                  daemon=True)
+                process.start()
+                running[name] = process
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                name, result = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            running.pop(name).join()
+
+            if isinstance(result, Exception):
+                print(f"Portfolio configuration {name} failed: {result!r}")
+                continue
+            solution, nodes_explored = result
+            if solution is not None and (best is None or len(solution) < len(best[0])):
+                best = (solution, nodes_explored, name)
+                if not wait_for_best:
+                    break
+    finally:
+        # Kill whatever is still running
+        for process in running.values():
+            process.terminate()
+        for process in running.values():
+            process.join()
+
+    if best is None:
+        raise TimeoutException(f"No portfolio configuration found a solution within {timeout} seconds.")
+
+    solution, nodes_explored, name = best
+    print(f"Portfolio winner: {name}")
+    return solution, nodes_explored
@@ -1,80 +1,278 @@
+import glob
+import os
 import re
 
-from blocks_world.state import BlockWorldState
+from blocks_world.state import BlockIndex, BlockWorldState, PackedState, TABLE_ID
+
+_TOKEN = re.compile(r"[()]|[^\s()]+")
+ON_TABLE = -1  # Support of the blocks on the table; unlike TABLE_ID it cannot collide with a block id
+
+
+class ProblemError(ValueError):
+    """
+    Raised when a problem file cannot be parsed or does not describe a valid Blocks World problem.
+    """
+
+
+class Problem:
+    """
+    Blocks World problem with its block names interned to integer ids.
+    initial[i] and goal[i] are the id of the block that block i sits on, or ON_TABLE.
+    Blocks without an ON goal belong on the table.
+    """
+
+    __slots__ = ("name", "blocks", "initial", "goal")
+
+    def __init__(self, name, blocks, initial, goal):
+        """
+        Initialize the problem.
+        :param name: Problem name from the (problem ...) header.
+        :param blocks: List of block names; a block's id is its position in it.
+        :param initial: List of initial support ids.
+        :param goal: List of goal support ids.
+        """
+        self.name = name
+        self.blocks = blocks
+        self.initial = initial
+        self.goal = goal
+
+    def __repr__(self):
+        return f"Problem({self.name}, {len(self.blocks)} blocks)"
+
+    def states(self):
+        """
+        Return the initial and goal states as BlockWorldState objects (any number of blocks).
+        """
+        return self._state(self.initial), self._state(self.goal)
+
+    def pack(self):
+        """
+        Return the initial and goal states as PackedState objects sharing one BlockIndex.
+        """
+        index = BlockIndex(self.blocks)
+        return PackedState(_packed(self.initial), index), PackedState(_packed(self.goal), index)
+
+    def _state(self, supports):
+        names = self.blocks
+        covered = set(supports)
+        return BlockWorldState(
+            clear={names[block] for block in range(len(names)) if block not in covered},
+            onTable={names[block] for block, below in enumerate(supports) if below == ON_TABLE},
+            on={names[block]: names[below] for block, below in enumerate(supports) if below != ON_TABLE})
+
+
+def _packed(supports):
+    """
+    Convert a support list into the bytes of a PackedState.
+    """
+    return bytes(TABLE_ID if below == ON_TABLE else below for below in supports)
+
+
+def tokenize(lines):
+    """
+    Split PDDL text into '(' and ')' and atom tokens, one line at a time, skipping ';' comments.
+    :param lines: Iterable of lines (e.g. an open file), so large files are never read at once.
+    """
+    for line in lines:
+        comment = line.find(";")
+        if comment >= 0:
+            line = line[:comment]
+        yield from _TOKEN.findall(line)
+
+
+def read_expressions(tokens):
+    """
+    Group tokens into top-level s-expressions, yielded one at a time as nested lists.
+    """
+    stack = []
+    current = None
+    for token in tokens:
+        if token == "(":
+            stack.append(current)
+            current = []
+        elif token == ")":
+            if not stack:
+                raise ProblemError("Unbalanced ')'.")
+            expression = current
+            current = stack.pop()
+            if current is None:
+                yield expression
+            else:
+                current.append(expression)
+        elif current is None:
+            raise ProblemError(f"Unexpected token {token!r} outside of an expression.")
+        else:
+            current.append(token)
+    if stack:
+        raise ProblemError("Unbalanced '(': the input ends inside an expression.")
+
+
+def build_problem(expression):
+    """
+    Build and validate a Problem from a parsed (define (problem ...) ...) expression.
+    Block ids are assigned in order of first appearance, :objects first.
+    """
+    head = expression[1] if len(expression) >= 2 else None
+    if not isinstance(head, list) or len(head) != 2 or not all(isinstance(part, str) for part in head) or \
+            not isinstance(expression[0], str) or expression[0].lower() != "define" or head[0].lower() != "problem":
+        raise ProblemError("Expected (define (problem <name>) ...).")
+    name = head[1]
+    sections = {}
+    for section in expression[2:]:
+        if not isinstance(section, list) or not section or not isinstance(section[0], str):
+            raise ProblemError(f"Problem {name}: malformed section {section!r}.")
+        sections[section[0].lower()] = section[1:]
+
+    ids = {}
+    blocks = []
+    declared = ":objects" in sections  # Atoms may then only mention declared blocks
+
+    for block in sections.get(":objects", []):
+        if not isinstance(block, str):
+            raise ProblemError(f"Problem {name}: malformed :objects section.")
+        if block not in ids:
+            ids[block] = len(blocks)
+            blocks.append(block)
+
+    def intern(block):
+        block_id = ids.get(block)
+        if block_id is None:
+            if declared:
+                raise ProblemError(f"Problem {name}: block {block} is not declared in :objects.")
+            block_id = ids[block] = len(blocks)
+            blocks.append(block)
+        return block_id
+
+    if ":init" not in sections:
+        raise ProblemError(f"Problem {name}: no :init section.")
+    if ":goal" not in sections or len(sections[":goal"]) != 1:
+        raise ProblemError(f"Problem {name}: no :goal section.")
+
+    init_atoms = sections[":init"]
+    goal = sections[":goal"][0]
+    goal_atoms = goal[1:] if goal and isinstance(goal[0], str) and goal[0].lower() == "and" else [goal]
+    initial = _read_atoms(name, "init", init_atoms, intern)
+    goal = _read_atoms(name, "goal", goal_atoms, intern)
+
+    initial_supports = _supports(name, "init", initial, blocks, complete=True)
+    goal_supports = _supports(name, "goal", goal, blocks, complete=False)
+    if initial["clear"] is not None:
+        covered = set(initial_supports)
+        for block in range(len(blocks)):
+            if (block in initial["clear"]) == (block in covered):
+                state = "listed as clear but covered" if block in covered else "covered by nothing but not clear"
+                raise ProblemError(f"Problem {name}: block {blocks[block]} is {state} in :init.")
+    return Problem(name, blocks, initial_supports, goal_supports)
+
+
+def _read_atoms(name, section, atoms, intern):
+    """
+    Collect the ON / ONTABLE / CLEAR atoms of a section as block ids.
+    :return: Dictionary with 'on' (list of (block, below) pairs), 'table' (list) and 'clear' (set or None).
+    """
+    result = {"on": [], "table": [], "clear": None}
+    for atom in atoms:
+        if not isinstance(atom, list) or not atom or not all(isinstance(part, str) for part in atom):
+            raise ProblemError(f"Problem {name}: malformed atom {atom!r} in :{section}.")
+        predicate = atom[0].upper()
+        if predicate == "ON" and len(atom) == 3:
+            result["on"].append((intern(atom[1]), intern(atom[2])))
+        elif predicate == "ONTABLE" and len(atom) == 2:
+            result["table"].append(intern(atom[1]))
+        elif predicate == "CLEAR" and len(atom) == 2:
+            if result["clear"] is None:
+                result["clear"] = set()
+            result["clear"].add(intern(atom[1]))
+        elif predicate == "HANDEMPTY" and len(atom) == 1:
+            continue
+        else:
+            raise ProblemError(f"Problem {name}: unsupported atom ({' '.join(atom)}) in :{section}.")
+    return result
+
+
+def _supports(name, section, atoms, blocks, complete):
+    """
+    Turn ON / ONTABLE atoms into a support list and check it describes towers.
+    :param complete: Whether every block must be placed explicitly (initial states).
+    :return: List of support ids, ON_TABLE for blocks on the table.
+    """
+    supports = [None] * len(blocks)
+    for block, below in atoms["on"] + [(block, ON_TABLE) for block in atoms["table"]]:
+        if block == below:
+            raise ProblemError(f"Problem {name}: block {blocks[block]} sits on itself in :{section}.")
+        if supports[block] is not None:
+            raise ProblemError(f"Problem {name}: block {blocks[block]} has more than one support in :{section}.")
+        supports[block] = below
+
+    above = set()
+    for block, below in enumerate(supports):
+        if below is None:
+            if complete:
+                raise ProblemError(f"Problem {name}: block {blocks[block]} has no support in :{section}.")
+            supports[block] = below = ON_TABLE
+        if below != ON_TABLE:
+            if below in above:
+                raise ProblemError(f"Problem {name}: two blocks sit on block {blocks[below]} in :{section}.")
+            above.add(below)
+
+    # Every tower must reach the table: walking down from any block may not loop
+    grounded = set()
+    for block in range(len(blocks)):
+        path = set()
+        while block != ON_TABLE and block not in grounded:
+            if block in path:
+                raise ProblemError(f"Problem {name}: the blocks of :{section} form a cycle.")
+            path.add(block)
+            block = supports[block]
+        grounded |= path
+    return supports
+
+
+def load_problems(path):
+    """
+    Stream the problems of a file (one or several concatenated (define ...) expressions) or of a directory
+    of .pddl files (in name order).
+    :param path: File or directory path.
+    :return: Generator of Problem objects.
+    """
+    paths = sorted(glob.glob(os.path.join(path, "*.pddl"))) if os.path.isdir(path) else [path]
+    for file_path in paths:
+        with open(file_path) as f:
+            for expression in read_expressions(tokenize(f)):
+                yield build_problem(expression)
+
+
+def load_problem(file_path):
+    """
+    Load the single problem of a PDDL file.
+    """
+    problems = load_problems(file_path)
+    problem = next(problems, None)
+    if problem is None:
+        raise ProblemError(f"No problem found in {file_path}.")
+    return problem
 
 
 def parse_problem(file_path):
     """
     Parse a PDDL problem file and return the initial state, goal state, and objects.
     """
-    # Define structures to hold the parsed data
-    objects = []
-    initial_state = []
-    goal_state = []
-
-    # Open and read the file
-    with open(file_path, 'r') as file:
-        data = file.read()
-
-    # Parse objects
-    obj_match = re.search(r'\(:objects (.*?)\)', data, re.DOTALL | re.IGNORECASE)
-    if not obj_match:
-        print("No :INIT section found in the file.")
-        return []
-    else:
-        objects = obj_match.group(1).split()
-
-    # Parse initial state
-    init_match = re.search(r'\(:init\s*(\(.*?\))*\)', data, re.DOTALL | re.IGNORECASE)
-    if not init_match:
-        print("No :INIT section found in the file.")
-    else:
-        # Extract from the object returned by the re.search
-        raw_init = init_match.group(1)
-
-        # Use regex to extract each item within parentheses
-        initial_state = re.findall(r'\((.*?)\)', raw_init)
-
-    # Parse goal state
-    goal_match = re.search(r'\(:goal\s*\(AND(.*)\)\)', data, re.DOTALL | re.IGNORECASE)
-    if not goal_match:
-        print("No :goal section found in the file.")
-    else:
-        # Captures the raw content inside the AND block
-        raw_goal = goal_match.group(1).strip()
-
-        # Extract individual conditions from raw data
-        goal_state = re.findall(r'\((.*?)\)', raw_goal)
+    problem = load_problem(file_path)
+    names = problem.blocks
+    covered = set(problem.initial)
+
+    initial_state = [f"CLEAR {names[block]}" for block in range(len(names)) if block not in covered]
+    for block, below in enumerate(problem.initial):
+        initial_state.append(f"ON {names[block]} {names[below]}" if below != ON_TABLE else f"ONTABLE {names[block]}")
+    goal_state = [f"ON {names[block]} {names[below]}" for block, below in enumerate(problem.goal) if below != ON_TABLE]
 
     # Return parsed data
     return {
-        "objects": objects,
+        "objects": list(names),
         "initial_state": initial_state,
         "goal_state": goal_state
     }
 
-def extract_state(initial_state_list):
-    """
-    Transform the initial state list into a BlockWorldState object.
-    """
-    clear = set()
-    onTable = set()
-    on = {}
-
-    for state in initial_state_list:
-        parts = state.split()
-        if parts[0] == "CLEAR":
-            clear.add(parts[1])
-        elif parts[0] == "ONTABLE":
-            onTable.add(parts[1])
-        elif parts[0] == "ON":
-            on[parts[1]] = parts[2]
-
-    # Handempty is always assumed True unless explicitly stated otherwise
-    handEmpty = True
-
-    return BlockWorldState(clear=clear, onTable=onTable, on=on, handEmpty=handEmpty)
-
 
 def print_data(input_file, output_file):
     """
@@ -86,4 +284,4 @@ def print_data(input_file, output_file):
 
     for key, value in parsed_data.items():
         # Print the data to the console
-        print(f"{key}: {value} (Type: {type(value).__name__})")
\ No newline at end of file
+        print(f"{key}: {value} (Type: {type(value).__name__})")
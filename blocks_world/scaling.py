@@ -0,0 +1,107 @@
+import argparse
+import csv
+import tempfile
+from statistics import mean
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")  # Render to files, without a display
+    import matplotlib.pyplot as plt
+except ImportError:  # Plots are optional; the table and CSV output do not need matplotlib
+    plt = None
+
+from blocks_world.benchmark import run_benchmark
+from blocks_world.generator import write_problems
+
+SUMMARY_FIELDS = ("algorithm", "blocks", "problems", "success_rate", "nodes_per_second", "peak_memory_kb",
+                  "wall_time")
+
+
+def summarize(results):
+    """
+    Aggregate benchmark results per algorithm and block count.
+    :param results: List of result dictionaries from run_benchmark.
+    :return: List of summary dictionaries (one per SUMMARY_FIELDS row), ordered by algorithm then block count.
+    """
+    groups = {}
+    for record in results:
+        groups.setdefault((record["algorithm"], record["blocks"]), []).append(record)
+
+    summary = []
+    for (algorithm, blocks), records in sorted(groups.items()):
+        throughputs = [record["nodes_per_second"] for record in records if record["nodes_per_second"]]
+        memories = [record["peak_memory_kb"] for record in records if record["peak_memory_kb"] is not None]
+        summary.append({
+            "algorithm": algorithm,
+            "blocks": blocks,
+            "problems": len(records),
+            "success_rate": sum(record["solved"] for record in records) / len(records),
+            "nodes_per_second": round(mean(throughputs), 1) if throughputs else None,
+            "peak_memory_kb": round(mean(memories)) if memories else None,
+            "wall_time": round(mean(record["wall_time"] for record in records), 6),
+        })
+    return summary
+
+
+def plot_summary(summary, path):
+    """
+    Plot node throughput, peak memory and success rate against block count, one line per algorithm.
+    :return: True if the plot was written, False if matplotlib is not installed.
+    """
+    if plt is None:
+        return False
+
+    metrics = (("nodes_per_second", "nodes / second"), ("peak_memory_kb", "peak memory (KiB)"),
+               ("success_rate", "success rate"))
+    figure, axes = plt.subplots(1, len(metrics), figsize=(15, 4))
+    for algorithm in sorted({row["algorithm"] for row in summary}):
+        rows = [row for row in summary if row["algorithm"] == algorithm]
+        for axis, (field, _) in zip(axes, metrics):
+            points = [(row["blocks"], row[field]) for row in rows if row[field] is not None]
+            axis.plot([x for x, _ in points], [y for _, y in points], marker="o", label=algorithm)
+    for axis, (_, label) in zip(axes, metrics):
+        axis.set_xlabel("blocks")
+        axis.set_ylabel(label)
+    axes[0].legend()
+    figure.tight_layout()
+    figure.savefig(path)
+    plt.close(figure)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how Blocks World solvers scale on random problems.")
+    parser.add_argument("--blocks", type=int, nargs="+", default=[4, 6, 8, 10, 12, 15, 20], help="block counts")
+    parser.add_argument("--count", type=int, default=5, help="random problems per block count")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    parser.add_argument("--algorithms", nargs="+", default=["bidirectional", "astar:deadlock", "ida:deadlock"],
+                        help="algorithm[:heuristic] specifications")
+    parser.add_argument("--timeout", type=int, default=10, help="time limit of each case in seconds")
+    parser.add_argument("--jobs", type=int, default=None, help="number of parallel worker processes")
+    parser.add_argument("--csv", help="write the per block count summary to this CSV file")
+    parser.add_argument("--plot", help="write the plots to this image file (needs matplotlib)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_problems(directory, args.blocks, count=args.count, seed=args.seed)
+        results = run_benchmark(paths, args.algorithms, timeout=args.timeout, jobs=args.jobs)
+    summary = summarize(results)
+
+    print(f"{'algorithm':<20} {'blocks':>6} {'solved':>7} {'nodes/s':>10} {'memory KiB':>11} {'time s':>8}")
+    for row in summary:
+        throughput = f"{row['nodes_per_second']:.0f}" if row["nodes_per_second"] is not None else "-"
+        memory = str(row["peak_memory_kb"]) if row["peak_memory_kb"] is not None else "-"
+        print(f"{row['algorithm']:<20} {row['blocks']:>6} {row['success_rate']:>7.0%} {throughput:>10} "
+              f"{memory:>11} {row['wall_time']:>8.3f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(summary)
+    if args.plot and not plot_summary(summary, args.plot):
+        print("matplotlib is not installed; no plot written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http import HTTPStatus
+
+from blocks_world.benchmark import make_solver, OPTIMAL_ALGORITHMS
+from blocks_world.instrumentation import SearchStats
+from blocks_world.plan import optimize_plan
+from blocks_world.problem_parser import build_problem, ProblemError, read_expressions, tokenize
+from blocks_world.state import TABLE_ID
+from blocks_world.towers import tower_solve
+from blocks_world.utils import solve_with_timeout, TimeoutException
+
+DEFAULT_ALGORITHM = "astar:deadlock"
+DEFAULT_TIMEOUT = 10  # Seconds per solve unless the request asks for another budget
+MAX_TIMEOUT = 300
+MAX_BODY_SIZE = 16 * 1024 * 1024
+LATENCY_WINDOW = 1000  # Latencies kept for the percentiles reported by /metrics
+
+
+def solve_problem(problem, spec, timeout):
+    """
+    Solve one problem. Runs inside a worker process of the pool.
+    :param problem: Problem object.
+    :param spec: 'algorithm[:heuristic]' specification, or 'towers'.
+    :param timeout: Time limit in seconds.
+    :return: Result dictionary (JSON-serializable).
+    """
+    stats = SearchStats()
+    start = time.perf_counter()
+    result = {"algorithm": spec, "blocks": len(problem.blocks)}
+    try:
+        if spec == "towers":
+            solution, _ = tower_solve(*problem.states())
+        else:
+            solve_function = partial(make_solver(spec), stats=stats)
+            solution, _ = solve_with_timeout(solve_function, problem.pack(), timeout=timeout)
+    except TimeoutException as e:
+        result.update(status="timeout", error=str(e))
+    else:
+        if solution is None:
+            result["status"] = "no_solution"
+        else:
+            if spec.partition(":")[0] not in OPTIMAL_ALGORITHMS:
+                solution = optimize_plan(*problem.states(), solution)
+            result.update(status="solved", length=len(solution), plan=solution)
+    result.update(nodes_expanded=stats.expanded, nodes_generated=stats.generated,
+                  solve_time=round(time.perf_counter() - start, 6))
+    return result
+
+
+def parse_timeout(value):
+    """
+    Read the time limit of a request, capped at MAX_TIMEOUT.
+    :raise ValueError: If it is not a positive, finite number of seconds (a NaN deadline would never expire).
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"Invalid timeout {value!r}.")
+    timeout = float(value)
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError(f"The timeout must be a positive number of seconds, got {value!r}.")
+    return min(timeout, MAX_TIMEOUT)
+
+
+def problem_from_request(request):
+    """
+    Build a Problem from a request body: either {"pddl": "<problem text>"} or a state description
+    {"initial": {"A": "B", "B": "TABLE"}, "goal": {"A": "B"}} mapping every block to what it sits on
+    (the goal may leave blocks out: they belong on the table).
+    :raise ProblemError: If the description is missing or invalid.
+    """
+    if "pddl" in request:
+        if not isinstance(request["pddl"], str):
+            raise ProblemError("'pddl' must be a string.")
+        expressions = list(read_expressions(tokenize(request["pddl"].splitlines())))
+        if len(expressions) != 1:
+            raise ProblemError("'pddl' must contain exactly one problem.")
+        return build_problem(expressions[0])
+
+    initial = request.get("initial")
+    goal = request.get("goal")
+    if not isinstance(initial, dict) or not isinstance(goal, dict):
+        raise ProblemError("The request needs 'pddl' text, or 'initial' and 'goal' objects.")
+
+    def atoms(state):
+        return [["ONTABLE", str(block)] if below == "TABLE" else ["ON", str(block), str(below)]
+                for block, below in state.items()]
+
+    # Reuse the loader's validation by building the s-expression a PDDL file would produce
+    return build_problem(["define", ["problem", "request"], [":init"] + atoms(initial),
+                          [":goal", ["and"] + atoms(goal)]])
+
+
+class Metrics:
+    """
+    Counters and latency window of the service.
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.requests = 0
+        self.solved = 0
+        self.failed = 0  # Timeouts, unsolvable problems and worker errors
+        self.invalid = 0  # Refused with 400 because the problem or the options were invalid
+        self.rejected = 0  # Refused with 503 because the queue was full
+        self.deduplicated = 0  # Answered by joining an identical in-flight solve
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self, in_flight, max_in_flight):
+        """
+        Return the metrics as a JSON-serializable dictionary.
+        """
+        uptime = time.monotonic() - self.start_time
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return round(latencies[min(int(fraction * len(latencies)), len(latencies) - 1)], 6) if latencies else None
+
+        return {
+            "uptime": round(uptime, 3),
+            "requests": self.requests,
+            "solved": self.solved,
+            "failed": self.failed,
+            "invalid": self.invalid,
+            "rejected": self.rejected,
+            "deduplicated": self.deduplicated,
+            "in_flight": in_flight,
+            "max_in_flight": max_in_flight,
+            "throughput": round((self.solved + self.failed) / uptime, 3) if uptime > 0 else 0.0,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": round(latencies[-1], 6) if latencies else None,
+        }
+
+
+class SolverService:
+    """
+    Asyncio HTTP service dispatching solves to a process pool.
+    POST /solve   body {"pddl": ...} or {"initial": ..., "goal": ...}, optional "algorithm" and "timeout"
+    GET  /metrics throughput, latency and queue counters
+    GET  /health  liveness check
+    Identical requests (same problem, algorithm and timeout) that arrive while one of them is being solved
+    share its result. When max_in_flight distinct solves are queued or running, new ones get a 503 reply.
+    """
+
+    def __init__(self, workers=None, max_in_flight=None):
+        """
+        Initialize the service.
+        :param workers: Number of worker processes (defaults to the number of CPU cores).
+        :param max_in_flight: Maximum number of distinct solves queued or running (defaults to 4 per worker).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 4 * self.workers
+        self.pool = None
+        self.in_flight = {}  # Request key -> future of the running solve
+        self.metrics = Metrics()
+
+    async def serve(self, host="127.0.0.1", port=8080, unix_path=None):
+        """
+        Run the service until cancelled.
+        :param unix_path: Listen on this unix socket instead of host and port.
+        """
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            if unix_path:
+                server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+            else:
+                server = await asyncio.start_server(self.handle_connection, host, port)
+            print(f"Serving on {unix_path or f'http://{host}:{port}'} with {self.workers} workers")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Read one HTTP request, answer it and close the connection.
+        """
+        try:
+            status, body = await self.handle_request(reader)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, body = HTTPStatus.BAD_REQUEST, {"error": str(e) or "Malformed request."}
+        payload = json.dumps(body).encode()
+        headers = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+                   f"Content-Length: {len(payload)}", "Connection: close"]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            headers.append("Retry-After: 1")
+        writer.write("\r\n".join(headers).encode() + b"\r\n\r\n" + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader):
+        """
+        Parse an HTTP request and route it.
+        :return: A tuple of (HTTPStatus, JSON-serializable body).
+        """
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise ValueError("Malformed request line.")
+        method, path, _ = request_line
+        length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        if length > MAX_BODY_SIZE:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large."}
+        body = await reader.readexactly(length) if length else b""
+
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok"}
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.metrics.snapshot(len(self.in_flight), self.max_in_flight)
+        if path == "/solve" and method == "POST":
+            return await self.solve(json.loads(body or b"{}"))
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {path}."}
+
+    async def solve(self, request):
+        """
+        Validate a solve request and wait for its result, joining an identical in-flight solve if any.
+        """
+        self.metrics.requests += 1
+        start = time.monotonic()
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("The request body must be a JSON object.")
+            problem = problem_from_request(request)
+            spec = str(request.get("algorithm", DEFAULT_ALGORITHM))
+            if spec != "towers":
+                make_solver(spec)  # Reject unknown algorithms before queueing
+                if len(problem.blocks) >= TABLE_ID:
+                    raise ProblemError(f"Only the towers algorithm handles more than {TABLE_ID - 1} blocks.")
+            timeout = parse_timeout(request.get("timeout", DEFAULT_TIMEOUT))
+        except (ProblemError, ValueError) as e:
+            self.metrics.invalid += 1
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+
+        key = (tuple(problem.blocks), tuple(problem.initial), tuple(problem.goal), spec, timeout)
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.metrics.deduplicated += 1
+        else:
+            if len(self.in_flight) >= self.max_in_flight:
+                self.metrics.rejected += 1
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many solves in flight; retry later."}
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, solve_problem, problem, spec, timeout)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        try:
+            result = await asyncio.shield(future)  # A client hanging up must not cancel a shared solve
+        except Exception as e:
+            self.metrics.failed += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)}
+        if result["status"] == "solved":
+            self.metrics.solved += 1
+        else:
+            self.metrics.failed += 1
+        self.metrics.latencies.append(time.monotonic() - start)
+        return HTTPStatus.OK, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Blocks World solves over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="TCP port to listen on")
+    parser.add_argument("--unix", help="listen on this unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="number of solver processes")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="distinct solves queued or running before requests are refused with 503")
+    args = parser.parse_args()
+
+    service = SolverService(workers=args.workers, max_in_flight=args.max_in_flight)
+    try:
+        asyncio.run(service.serve(args.host, args.port, unix_path=args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,10 @@
+import hashlib
+from functools import lru_cache
+
+ZOBRIST_SEED = 0x5EED  # Fixed, so state hashes are identical in every process
+PAIR_KEY_CACHE_SIZE = 1 << 16  # Zobrist keys kept in memory (every pair of 255 blocks)
+
+
 class BlockWorldState:
     """
     Represents a state in the Blocks World problem.
@@ -18,6 +25,7 @@ class BlockWorldState:
         self.handEmpty = handEmpty
         self.action = action
         self.cost = cost  # Ensure all instances have a cost attribute - A*
+        self._key = None  # Zobrist hash of 'on', computed on first use and then kept up to date by move()
 
     def __repr__(self):
         return (
@@ -32,7 +40,20 @@ class BlockWorldState:
         return self.on == other.on
 
     def __hash__(self):
-        return hash((frozenset(self.clear), frozenset(self.onTable), frozenset(self.on.items()), self.handEmpty))
+        # Hash the same field that __eq__ compares, so equal states share a hash
+        return self.zobrist_key()
+
+    def zobrist_key(self):
+        """
+        Return the 64-bit Zobrist hash of the 'on' mapping: the XOR of one fixed random key per (block, below)
+        pair. It only depends on the block names, so it is the same in every process.
+        """
+        if self._key is None:
+            key = 0
+            for pair in self.on.items():
+                key ^= pair_key(*pair)
+            self._key = key
+        return self._key
 
     def __lt__(self, other):
         """
@@ -114,5 +135,171 @@ def move(state, block, from_location, to_location):
     # Increment cost when a move is made
     new_state.cost += 1
 
+    # Only the moved block's support changed: update the hash in O(1) instead of recomputing it
+    if state._key is not None:
+        key = state._key
+        if from_location != "TABLE":
+            key ^= pair_key(block, from_location)
+        if to_location != "TABLE":
+            key ^= pair_key(block, to_location)
+        new_state._key = key
+
     return new_state
 
+
+@lru_cache(maxsize=PAIR_KEY_CACHE_SIZE)
+def pair_key(block, below):
+    """
+    Zobrist key of 'block is on below', derived from the names so it does not depend on the process.
+    Keys are recomputed when they fall out of the cache, so long-running processes see ever new block
+    names without growing it.
+    """
+    digest = hashlib.blake2b(f"{block}\0{below}".encode(), digest_size=8, key=ZOBRIST_SEED.to_bytes(2, "big"))
+    return int.from_bytes(digest.digest(), "big")
+
+
+TABLE = "TABLE"
+TABLE_ID = 0xFF  # Packed value meaning "on the table"
+
+_BYTES = tuple(bytes((value,)) for value in range(256))  # Interned single-byte objects
+
+
+class BlockIndex:
+    """
+    Interns the block names of a problem to small integer ids.
+    Every PackedState of a problem shares the same BlockIndex.
+    """
+
+    __slots__ = ("names", "ids")
+
+    def __init__(self, names):
+        """
+        Initialize the index.
+        :param names: Iterable of block names; a block's id is its position in it.
+        """
+        self.names = tuple(names)
+        if len(self.names) >= TABLE_ID:
+            raise ValueError(f"At most {TABLE_ID - 1} blocks can be packed, got {len(self.names)}.")
+        self.ids = {name: block_id for block_id, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_states(cls, *states):
+        """
+        Create an index covering every block mentioned by the given BlockWorldState objects.
+        """
+        names = set()
+        for state in states:
+            names.update(state.clear)
+            names.update(state.onTable)
+            names.update(state.on)
+            names.update(state.on.values())
+        return cls(sorted(names))
+
+    def name(self, block_id):
+        """
+        Return the name of a block id ('TABLE' for TABLE_ID).
+        """
+        return TABLE if block_id == TABLE_ID else self.names[block_id]
+
+    def pack(self, state):
+        """
+        Convert a BlockWorldState into a PackedState.
+        Blocks that are not on another block are packed as being on the table.
+        """
+        on = bytearray(_BYTES[TABLE_ID] * len(self.names))
+        for block, below in state.on.items():
+            on[self.ids[block]] = self.ids[below]
+        return PackedState(bytes(on), self)
+
+    def format_move(self, action):
+        """
+        Format a (block, from, to) move tuple as 'Move X from Y to Z'.
+        """
+        block, from_location, to_location = action
+        return f"Move {self.name(block)} from {self.name(from_location)} to {self.name(to_location)}"
+
+
+class PackedState:
+    """
+    Compact, immutable state in the Blocks World problem.
+    on[i] is the id of the block that block i sits on, or TABLE_ID.
+    """
+
+    __slots__ = ("on", "index", "_hash")
+
+    def __init__(self, on, index):
+        """
+        Initialize the state.
+        :param on: bytes object of length len(index) describing what each block sits on.
+        :param index: BlockIndex shared by all states of the problem.
+        """
+        self.on = on
+        self.index = index
+        # Hashing the few bytes in C is cheaper than a Zobrist update in Python, so unlike BlockWorldState
+        # packed states hash their bytes once, on creation
+        self._hash = hash(on)
+
+    def __repr__(self):
+        return f"PackedState({self.unpack().on})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedState):
+            return False
+        return self.on == other.on
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Recompute the hash on unpickling: str/bytes hashes differ between processes started with 'spawn'
+        return PackedState, (self.on, self.index)
+
+    def __lt__(self, other):
+        """
+        Order states by their packed bytes, so heap ties are broken deterministically.
+        """
+        if not isinstance(other, PackedState):
+            return NotImplemented
+        return self.on < other.on
+
+    def clear_blocks(self):
+        """
+        Return the ids of the blocks that have nothing on top of them.
+        """
+        covered = set(self.on)
+        return [block for block in range(len(self.on)) if block not in covered]
+
+    def unpack(self):
+        """
+        Convert the state back into a BlockWorldState.
+        """
+        names = self.index.names
+        covered = set(self.on)
+        clear = {names[block] for block in range(len(names)) if block not in covered}
+        onTable = {names[block] for block, below in enumerate(self.on) if below == TABLE_ID}
+        on = {names[block]: names[below] for block, below in enumerate(self.on) if below != TABLE_ID}
+        return BlockWorldState(clear=clear, onTable=onTable, on=on)
+
+
+def move_packed(state, block, to_location):
+    """
+    Apply a move action to a packed state.
+    :param state: PackedState object.
+    :param block: Id of the (clear) block to move.
+    :param to_location: Id of the destination block, or TABLE_ID.
+    :return: New PackedState object.
+    """
+    on = state.on
+    return PackedState(on[:block] + _BYTES[to_location] + on[block + 1:], state.index)
+
+
+def pack_problem(initial_state, goal_state):
+    """
+    Convert the parsed initial and goal BlockWorldState objects into PackedState objects sharing one BlockIndex.
+    :return: A tuple of (packed initial state, packed goal state).
+    """
+    index = BlockIndex.from_states(initial_state, goal_state)
+    return index.pack(initial_state), index.pack(goal_state)
@@ -0,0 +1,281 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections import deque
+
+from blocks_world.graph import successors, apply_move
+from blocks_world.heuristic_search import HEURISTICS
+from blocks_world.problem_parser import load_problem
+from blocks_world.state import PackedState
+
+GRAPH_DIRECTORY = os.path.join(".", "data", "graphs")  # Where state graphs are stored between runs
+MAGIC = b"BWCSR\x01\x00\x00"
+HEADER = struct.Struct("=8sIIQ")  # Magic, block count, state count, edge count
+UNREACHED = 0xFF
+
+
+class StateGraph:
+    """
+    State space of a Blocks World problem in compressed sparse row (CSR) form.
+    State ids are the ranks of the packed states in sorted order, so they only depend on the number of blocks
+    (every state of n blocks is reachable from every other one) and a state's id is found by binary search.
+    The neighbors of state i are targets[offsets[i]:offsets[i + 1]]. Arrays are in native byte order.
+    """
+
+    __slots__ = ("blocks", "states", "offsets", "targets", "_mapped")
+
+    def __init__(self, blocks, states, offsets, targets, mapped=None):
+        """
+        Initialize the graph.
+        :param blocks: Number of blocks (bytes per state).
+        :param states: Bytes-like object of the sorted packed states, back to back.
+        :param offsets: Sequence of len(states) // blocks + 1 row offsets into targets.
+        :param targets: Sequence of neighbor ids.
+        :param mapped: mmap object backing the arrays, if loaded from a file.
+        """
+        self.blocks = blocks
+        self.states = states
+        self.offsets = offsets
+        self.targets = targets
+        self._mapped = mapped
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def edge_count(self):
+        return len(self.targets)
+
+    def state(self, state_id):
+        """
+        Return the packed bytes of a state id.
+        """
+        start = state_id * self.blocks
+        return bytes(self.states[start:start + self.blocks])
+
+    def find(self, on):
+        """
+        Return the id of a packed state.
+        :raise KeyError: If the state is not part of the graph.
+        """
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.state(middle) < on:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(self) or self.state(low) != on:
+            raise KeyError(on)
+        return low
+
+    def neighbors(self, state_id):
+        """
+        Return the ids of the states one move away from a state.
+        """
+        return self.targets[self.offsets[state_id]:self.offsets[state_id + 1]]
+
+    def distances(self, state_id):
+        """
+        Breadth-first search from a state over the whole graph. Moves are reversible, so this also gives the
+        distance of every state to it.
+        :return: array of one distance per state id (UNREACHED for states more than 254 moves away).
+        """
+        distances = array("B", [UNREACHED]) * len(self)
+        distances[state_id] = 0
+        offsets = self.offsets
+        targets = self.targets
+        queue = deque([state_id])
+        while queue:
+            current = queue.popleft()
+            distance = distances[current] + 1
+            if distance == UNREACHED:
+                break
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if distances[neighbor] == UNREACHED:
+                    distances[neighbor] = distance
+                    queue.append(neighbor)
+        return distances
+
+    def save(self, path):
+        """
+        Write the graph to a file that load() memory-maps. The file is replaced atomically.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.blocks, len(self), self.edge_count()))
+            f.write(self.states)
+            f.write(bytes(_padding(len(self.states))))  # Keeps the arrays 8-byte aligned
+            f.write(array("Q", self.offsets).tobytes())
+            f.write(array("I", self.targets).tobytes())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a graph written by save(); nothing is read until it is used.
+        :raise ValueError: If the file is not a complete state graph.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) < HEADER.size:
+            raise ValueError(f"{path} is not a state graph file.")
+        magic, blocks, states, edges = HEADER.unpack_from(mapped)
+        states_end = HEADER.size + states * blocks
+        offsets_start = states_end + _padding(states * blocks)
+        targets_start = offsets_start + (states + 1) * 8
+        if magic != MAGIC or len(mapped) != targets_start + edges * 4:
+            mapped.close()
+            raise ValueError(f"{path} is not a state graph file.")
+        view = memoryview(mapped)
+        return cls(blocks, view[HEADER.size:states_end], view[offsets_start:targets_start].cast("Q"),
+                   view[targets_start:].cast("I"), mapped)
+
+
+def _padding(length):
+    return -length % 8
+
+
+def build_state_graph(initial_state):
+    """
+    Explore the state space from a state and store it as a StateGraph.
+    States are discovered breadth-first with a deque, numbered in discovery order while their edges are
+    recorded, and renumbered in sorted order at the end.
+    :param initial_state: PackedState.
+    :return: StateGraph of every state reachable from the initial state.
+    """
+    ids = {initial_state.on: 0}  # Packed state -> discovery number
+    states = [initial_state.on]
+    offsets = array("Q", [0])
+    targets = array("I")
+    queue = deque([initial_state])
+    while queue:
+        current_state = queue.popleft()  # States leave the queue in discovery order
+        for action in successors(current_state):
+            neighbor = apply_move(current_state, action)
+            neighbor_id = ids.get(neighbor.on)
+            if neighbor_id is None:
+                neighbor_id = ids[neighbor.on] = len(states)
+                states.append(neighbor.on)
+                queue.append(neighbor)
+            targets.append(neighbor_id)
+        offsets.append(len(targets))
+    del ids
+
+    # Renumber in sorted order
+    order = sorted(range(len(states)), key=states.__getitem__)
+    rank = array("I", bytes(4 * len(states)))
+    for new_id, old_id in enumerate(order):
+        rank[old_id] = new_id
+    sorted_offsets = array("Q", [0])
+    sorted_targets = array("I")
+    for old_id in order:
+        sorted_targets.extend(rank[target] for target in targets[offsets[old_id]:offsets[old_id + 1]])
+        sorted_offsets.append(len(sorted_targets))
+    return StateGraph(len(initial_state.on), b"".join(states[old_id] for old_id in order), sorted_offsets,
+                      sorted_targets)
+
+
+def load_state_graph(initial_state, directory=GRAPH_DIRECTORY):
+    """
+    Return the state graph of a problem's block count, memory-mapped from its file, building and saving it
+    first if needed. Problems with the same number of blocks share the file.
+    :param initial_state: PackedState of the problem.
+    :param directory: Directory of the graph files (None builds the graph in memory).
+    """
+    if directory is None:
+        return build_state_graph(initial_state)
+    path = os.path.join(directory, f"blocks-{len(initial_state.on)}.csr")
+    if os.path.exists(path):
+        try:
+            return StateGraph.load(path)
+        except ValueError:
+            pass  # Incomplete or outdated: rebuild it
+    graph = build_state_graph(initial_state)
+    graph.save(path)
+    return graph
+
+
+class DistanceOracle:
+    """
+    Exact distances to a goal state, precomputed by one backward breadth-first search over a StateGraph.
+    Used as a perfect heuristic, or to check the plans and heuristics of the other solvers.
+    """
+
+    def __init__(self, graph, goal_state):
+        """
+        Initialize the oracle.
+        :param graph: StateGraph of the problem's block count.
+        :param goal_state: Goal PackedState.
+        """
+        self.graph = graph
+        self.goal_state = goal_state
+        self.table = graph.distances(graph.find(goal_state.on))
+
+    def distance(self, state):
+        """
+        Return the length of a shortest plan from a PackedState to the goal.
+        """
+        return self.table[self.graph.find(state.on)]
+
+    def heuristic(self, state, goal_state):
+        """
+        Perfect heuristic: the exact distance to the goal (the oracle's goal must be the one searched for).
+        """
+        if goal_state.on != self.goal_state.on:
+            raise ValueError("The oracle was built for another goal state.")
+        return self.distance(state)
+
+    def is_optimal(self, initial_state, plan):
+        """
+        Return True if a (valid) plan from the initial state has the length of a shortest plan.
+        """
+        return len(plan) == self.distance(initial_state)
+
+    def check_heuristic(self, heuristic):
+        """
+        Evaluate a heuristic on every state and compare it with the exact distances.
+        :return: A tuple of (number of states it overestimates, number of edges along which it drops by more
+                 than one move, i.e. inconsistencies).
+        """
+        graph = self.graph
+        index = self.goal_state.index
+        values = [heuristic(PackedState(graph.state(state_id), index), self.goal_state)
+                  for state_id in range(len(graph))]
+        overestimates = sum(value > distance for value, distance in zip(values, self.table))
+        inconsistent = 0
+        offsets = graph.offsets
+        targets = graph.targets
+        for state_id, value in enumerate(values):
+            for neighbor in targets[offsets[state_id]:offsets[state_id + 1]]:
+                if value > values[neighbor] + 1:
+                    inconsistent += 1
+        return overestimates, inconsistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the state graph of a small Blocks World problem and "
+                                                 "check the heuristics against its exact distances.")
+    parser.add_argument("problem", help="PDDL problem file")
+    parser.add_argument("--directory", default=GRAPH_DIRECTORY, help="directory of the graph files")
+    parser.add_argument("--heuristics", nargs="*", default=list(HEURISTICS), help="heuristics to check")
+    args = parser.parse_args()
+
+    initial_state, goal_state = load_problem(args.problem).pack()
+    start = time.perf_counter()
+    graph = load_state_graph(initial_state, directory=args.directory)
+    oracle = DistanceOracle(graph, goal_state)
+    print(f"{len(graph)} states, {graph.edge_count()} edges ({time.perf_counter() - start:.2f}s)")
+    print(f"Optimal plan length: {oracle.distance(initial_state)}")
+    for name in args.heuristics:
+        overestimates, inconsistent = oracle.check_heuristic(HEURISTICS[name])
+        print(f"{name:<12} overestimates {overestimates} states, inconsistent on {inconsistent} edges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from blocks_world.state import TABLE
+
+
+def tower_plan(initial_state, goal_state):
+    """
+    Domain-specific Blocks World planner running in linear time in the number of blocks.
+    A block is well-placed when it sits on its goal position and everything below it is well-placed; a
+    well-placed block never has to move again. The planner repeats:
+    1. Move a clear block directly onto its goal position when that position is ready (the table, or a
+       well-placed clear block). The block becomes well-placed.
+    2. Otherwise move a clear block that is not well-placed and not on the table to the table.
+    Every block that is not well-placed moves at most twice, so the plan is at most twice as long as an
+    optimal one (and usually much closer), which makes its length a cheap upper bound for optimal solvers.
+    Works on BlockWorldState objects, so the number of blocks is not limited by the packed representation.
+    :param initial_state: Initial BlockWorldState.
+    :param goal_state: Goal BlockWorldState (blocks without an ON goal belong on the table).
+    :return: List of moves ('Move X from Y to Z').
+    """
+    # Sorted, so that plans do not depend on string hashing
+    blocks = sorted(initial_state.clear | initial_state.onTable | set(initial_state.on) |
+                    set(initial_state.on.values()) | goal_state.clear | goal_state.onTable |
+                    set(goal_state.on) | set(goal_state.on.values()))
+    below = {block: initial_state.on.get(block, TABLE) for block in blocks}
+    goal_below = {block: goal_state.on.get(block, TABLE) for block in blocks}
+    above = {support: block for block, support in below.items() if support != TABLE}
+    goal_above = {support: block for block, support in goal_below.items() if support != TABLE}
+
+    # Find the well-placed blocks by walking every tower from the table up
+    well_placed = set()
+    for block in blocks:
+        if below[block] != TABLE:
+            continue
+        current = block
+        while current is not None and below[current] == goal_below[current] and \
+                (below[current] == TABLE or below[current] in well_placed):
+            well_placed.add(current)
+            current = above.get(current)
+
+    def ready(block):
+        """A block can be moved straight to its goal position."""
+        if block in well_placed or block in above:
+            return False
+        target = goal_below[block]
+        return target == TABLE or (target in well_placed and target not in above)
+
+    # Candidates are checked when taken, so stale entries are simply skipped
+    constructive = [block for block in blocks if ready(block)]
+    to_table = [block for block in blocks if block not in above and below[block] != TABLE]
+    plan = []
+
+    while len(well_placed) < len(blocks):
+        if constructive:
+            block = constructive.pop()
+            if not ready(block):
+                continue
+            to_location = goal_below[block]
+        elif to_table:
+            block = to_table.pop()
+            if block in well_placed or block in above or below[block] == TABLE:
+                continue
+            to_location = TABLE
+        else:
+            raise RuntimeError("No applicable move left; the goal is not a valid Blocks World state.")
+
+        from_location = below[block]
+        plan.append(f"Move {block} from {from_location} to {to_location}")
+        below[block] = to_location
+        if from_location != TABLE:
+            del above[from_location]
+            # The uncovered block may now be movable, or ready to receive its goal block
+            constructive.append(from_location)
+            to_table.append(from_location)
+            if from_location in goal_above:
+                constructive.append(goal_above[from_location])
+        if to_location != TABLE:
+            above[to_location] = block
+
+        if to_location == goal_below[block]:
+            well_placed.add(block)
+            if block in goal_above:
+                constructive.append(goal_above[block])
+        else:
+            constructive.append(block)  # Its goal position may become ready later
+
+    return plan
+
+
+def tower_solve(initial_state, goal_state, stats=None, deadline=None):
+    """
+    Solve a problem with tower_plan.
+    :param initial_state: Initial BlockWorldState.
+    :param goal_state: Goal BlockWorldState.
+    :param stats: Unused; accepted for the common solver signature.
+    :param deadline: Unused; the planner runs in linear time.
+    :return: Solution path and the number of nodes explored, always 0 as the planner does not search.
+    """
+    return tower_plan(initial_state, goal_state), 0
+
+
+def plan_upper_bound(initial_state, goal_state):
+    """
+    Return the length of the tower_plan of two PackedState objects: an upper bound on the optimal plan length.
+    """
+    return len(tower_plan(initial_state.unpack(), goal_state.unpack()))
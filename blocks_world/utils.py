@@ -1,11 +1,15 @@
-import multiprocessing
-import signal
-import sys
+import os
+import threading
+import time
+
 
 def save_solution(file_path, solution):
     """
-    Save the solution to a file in the specified format.
+    Save the solution to a file in the specified format, creating its directory if needed.
     """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
     with open(file_path, "w") as f:
         for move in solution:
             f.write(f"{move}\n")
@@ -15,10 +19,10 @@ def reconstruct_path(prev, moves, start, end):
     """
     Reconstruct path from BFS by tracing back from the end node to the start node.
     :param prev: Dictionary mapping states to their predecessor states.
-    :param moves: Dictionary mapping states to the moves that led to them.
-    :param start: The starting state.
-    :param end: The goal state.
-    :return: List of moves leading from the start to the goal.
+    :param moves: Dictionary mapping states to the (block, from, to) moves that led to them.
+    :param start: The starting PackedState.
+    :param end: The goal PackedState.
+    :return: List of moves ('Move X from Y to Z') leading from the start to the goal.
     """
     path = []
     current = end
@@ -26,7 +30,7 @@ def reconstruct_path(prev, moves, start, end):
         if current not in moves:
             raise KeyError(f"State {current} not found in moves dictionary.")
 
-        path.append(moves[current])  # Add the move that led to the current state
+        path.append(end.index.format_move(moves[current]))  # Add the move that led to the current state
         current = prev[current]  # Move to the predecessor
     path.reverse()  # Reverse to get the correct order
     return path
@@ -35,74 +39,69 @@ def reconstruct_path(prev, moves, start, end):
 class TimeoutException(Exception):
     pass
 
-# ✅ Windows Function to Run the Solver
-def solve_worker(solve_function, args, queue):
-    """Standalone function to run the solver inside a separate process."""
-    try:
-        result = solve_function(*args)
-        queue.put(result)  # Send result back through the queue
-    except Exception as e:
-        queue.put(e)
-
 
-def solve_with_timeout(solve_function, args, timeout=60):
+class Deadline:
     """
-    Run a function with a timeout.
-    :param solve_function: Function to run (e.g., bfs_solve or dfs_solve).
-    :param args: Arguments to pass to the function.
-    :param timeout: Maximum time allowed (in seconds).
-    :return: Result of the function if completed within timeout, otherwise None.
+    Cooperative time limit and cancellation token of a solve.
+    Solvers call check() once per expansion, which raises TimeoutException once the time limit has passed
+    or cancel() has been called (from any thread). No signal handler or global state is involved, so
+    deadlines work in worker threads and process pools, have sub-second resolution and can be nested.
+    The solver's statistics object is filled on the way out, so a timed-out search still reports its counters.
     """
-    if sys.platform.startswith("win"):  # Windows uses multiprocessing
-        return solve_with_timeout_windows(solve_function, args, timeout)
-    else:  # Linux/macOS uses signals
-        return solve_with_timeout_unix(solve_function, args, timeout)
-
-
-# ✅ Linux/macOS Version (Using `signal`)
-def solve_with_timeout_unix(solve_function, args, timeout=60):
-    """UNIX-based timeout handling using signal."""
-    def timeout_handler(signum, frame):
-        raise TimeoutException("Execution exceeded the time limit of 60 seconds.")
-
-    signal.signal(signal.SIGALRM, timeout_handler)  # Set timeout handler
-    signal.alarm(timeout)  # Start countdown
-
-    try:
-        result = solve_function(*args)  # Run the solver
-        signal.alarm(0)  # Cancel alarm if execution finishes in time
-        return result
-    except TimeoutException:
-        raise TimeoutException(f"Execution exceeded the time limit of {timeout} seconds.")
 
+    __slots__ = ("seconds", "expires_at", "parent", "_limit", "_cancelled")
+
+    def __init__(self, seconds=None, parent=None):
+        """
+        Initialize the deadline.
+        :param seconds: Time budget in seconds from now, or None for no time limit (cancellation only).
+        :param parent: Optional enclosing Deadline; this one expires no later than it, and with it.
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self._limit = seconds  # Budget of the deadline that sets expires_at, for the timeout message
+        if parent is not None and parent.expires_at is not None and \
+                (self.expires_at is None or parent.expires_at < self.expires_at):
+            self.expires_at = parent.expires_at
+            self._limit = parent._limit
+        self.parent = parent
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Stop the solve at its next check (thread-safe).
+        """
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled())
+
+    def remaining(self):
+        """
+        Return the number of seconds left (never negative), or None without a time limit.
+        """
+        return max(self.expires_at - time.monotonic(), 0.0) if self.expires_at is not None else None
+
+    def expired(self):
+        return self.cancelled() or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def check(self):
+        """
+        Raise TimeoutException if the deadline has expired or was cancelled.
+        """
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise TimeoutException(f"Execution exceeded the time limit of {self._limit} seconds.")
+        if self.cancelled():
+            raise TimeoutException("Execution was cancelled.")
 
-# ✅ Windows Version (Using `multiprocessing`)
-def solve_with_timeout_windows(solve_function, args, timeout=60):
-    """Windows timeout handling using multiprocessing (forcefully kills process after timeout)."""
-    queue = multiprocessing.Queue()
-    process = multiprocessing.Process(target=solve_worker, args=(solve_function, args, queue))
 
-    process.start()
-    process.join(timeout)
-
-    if process.is_alive():
-        process.terminate()  # Kill the process if it exceeds timeout
-        process.join()
-        raise TimeoutException(f"Execution exceeded the time limit of {timeout} seconds.")
-
-    if not queue.empty():
-        result = queue.get()
-        if isinstance(result, Exception):
-            raise result  # Re-raise error if function crashed
-        return result
-
-    raise TimeoutException("No result returned from the solve function.")
-
-
-# ✅ Main Timeout Function (Auto-selects Windows or UNIX version)
 def solve_with_timeout(solve_function, args, timeout=60):
-    """Run a function with a timeout."""
-    if sys.platform.startswith("win"):
-        return solve_with_timeout_windows(solve_function, args, timeout)
-    else:
-        return solve_with_timeout_unix(solve_function, args, timeout)
\ No newline at end of file
+    """
+    Run a solver with a time limit.
+    :param solve_function: Function to run (e.g., bfs_solve or dfs_solve); it must accept a 'deadline' keyword.
+    :param args: Arguments to pass to the function.
+    :param timeout: Maximum time allowed (in seconds, fractions allowed).
+    :return: Result of the function.
+    :raise TimeoutException: If the solver did not finish in time.
+    """
+    return solve_function(*args, deadline=Deadline(timeout))
@@ -1,34 +1,83 @@
 import os
 import sys
 import time
+from functools import partial
 
+from blocks_world.anytime import anytime_search
+from blocks_world.benchmark import OPTIMAL_ALGORITHMS
 from blocks_world.bfs import bfs_solve
+from blocks_world.bidirectional import bidirectional_solve
 from blocks_world.dfs import dfs_solve
+from blocks_world.external_bfs import external_bfs_solve
+from blocks_world.hda_star import hda_star_search
 from blocks_world.heuristic_search import a_star_search, misplaced_blocks_heuristic, distance_to_goal_heuristic, \
-    best_first_search
-from blocks_world.problem_parser import print_data, extract_state, parse_problem
+    best_first_search, deadlock_heuristic, HEURISTICS
+from blocks_world.ida_star import ida_star_search
+from blocks_world.instrumentation import SearchStats
+from blocks_world.plan import optimize_plan, PlanError, validate_plan
+from blocks_world.plan_cache import PlanCache
+from blocks_world.portfolio import portfolio_solve
+from blocks_world.problem_parser import load_problem, ProblemError
+from blocks_world.towers import plan_upper_bound, tower_plan, tower_solve
 from blocks_world.utils import save_solution, solve_with_timeout, TimeoutException
 
 
-def run_best_first(state, goal):
-    return best_first_search(state, goal, misplaced_blocks_heuristic)
+TIMEOUT = 60  # Time limit of a solve (in seconds)
+IDA_STAR_TABLE_SIZE = 1_000_000  # Transposition table entries kept by IDA*
+ALGORITHMS = ("bfs", "external-bfs", "dfs", "bidirectional", "best", "astar", "ida", "hda", "anytime", "portfolio",
+              "towers")
+HEURISTIC_ALGORITHMS = ("best", "astar", "ida", "hda", "anytime")
 
 
-def run_a_star(state, goal):
-    return a_star_search(state, goal, distance_to_goal_heuristic)
+def run_best_first(state, goal, heuristic=misplaced_blocks_heuristic, stats=None, deadline=None):
+    return best_first_search(state, goal, heuristic, stats=stats, deadline=deadline)
+
+
+def run_a_star(state, goal, heuristic=distance_to_goal_heuristic, stats=None, deadline=None):
+    # The tower plan length bounds the search; with an admissible heuristic a plan within it is always found
+    return a_star_search(state, goal, heuristic, upper_bound=plan_upper_bound(state, goal), stats=stats,
+                         deadline=deadline)
+
+
+def run_ida_star(state, goal, heuristic=deadlock_heuristic, stats=None, deadline=None):
+    return ida_star_search(state, goal, heuristic, table_size=IDA_STAR_TABLE_SIZE, stats=stats, deadline=deadline)
+
+
+def run_hda_star(state, goal, heuristic=deadlock_heuristic, stats=None, deadline=None):
+    return hda_star_search(state, goal, heuristic, stats=stats, deadline=deadline)
+
+
+def run_anytime(state, goal, heuristic=deadlock_heuristic, stats=None, deadline=None):
+    plan = tower_plan(state.unpack(), goal.unpack())
+    print(f"Tower planner: {len(plan)} moves")
+    return anytime_search(state, goal, heuristic, on_improvement=report_improvement, initial_plan=plan, stats=stats,
+                          deadline=deadline)
+
+
+def report_improvement(plan, weight):
+    print(f"Found a plan of {len(plan)} moves (weight {weight})")
 
 
 def main():
-    if len(sys.argv) != 4:
-        print("Usage: python main.py <algorithm> <input_file> <output_file>")
+    use_cache = "--no-cache" not in sys.argv  # Always solve, without reading or writing the plan cache
+    arguments = [argument for argument in sys.argv if argument != "--no-cache"]
+    if len(arguments) not in (4, 5):
+        print("Usage: python main.py <algorithm> <input_file> <output_file> [heuristic] [--no-cache]")
+        print(f"Algorithms: {', '.join(ALGORITHMS)}")
+        print(f"Heuristics: {', '.join(HEURISTICS)} (for {', '.join(HEURISTIC_ALGORITHMS)})")
         sys.exit(1)
 
-    algorithm = sys.argv[1].lower()  # 'bfs', 'dfs', 'best', or 'astar'
-    input_file_name = sys.argv[2]  # Input file name
-    output_file = sys.argv[3]  # Output file name
+    algorithm = arguments[1].lower()  # One of ALGORITHMS
+    input_file_name = arguments[2]  # Input file name
+    output_file = arguments[3]  # Output file name
+    heuristic_name = arguments[4].lower() if len(arguments) == 5 else None  # Optional, for HEURISTIC_ALGORITHMS
     input_file_path = f"./data/problems/{input_file_name}"  # Full path to input file
     output_file_path = f"./data/solutions/{output_file}.txt"  # Output file path
 
+    if heuristic_name is not None and heuristic_name not in HEURISTICS:
+        print(f"Heuristic {heuristic_name} is not implemented.")
+        sys.exit(1)
+
     # Check if the input file exists
     if not os.path.exists(input_file_path):
         print(f"Error: Input file {input_file_path} does not exist.")
@@ -36,42 +85,108 @@ def main():
 
     # Parse the problem and extract states
     print(f"Parsing problem from {input_file_path}...")
-    parsed_data = parse_problem(input_file_path)
-    initial_state = extract_state(parsed_data["initial_state"])
-    goal_state = extract_state(parsed_data["goal_state"])
+    try:
+        problem = load_problem(input_file_path)
+    except ProblemError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    initial_state, goal_state = problem.states()
+    plain_states = (initial_state, goal_state)  # The plan cache works on the plain states
+    if algorithm != "towers":  # The tower planner handles any number of blocks, so it keeps the plain states
+        initial_state, goal_state = problem.pack()
 
     # Select the algorithm
     if algorithm == "bfs":
         solve_function = bfs_solve
+    elif algorithm == "external-bfs":
+        solve_function = external_bfs_solve  # Keeps its layers in a temporary directory
     elif algorithm == "dfs":
         solve_function = dfs_solve
+    elif algorithm == "bidirectional":
+        solve_function = bidirectional_solve
     elif algorithm == "best":
         solve_function = run_best_first  # ✅ Use named function instead of lambda
     elif algorithm == "astar":
         solve_function = run_a_star  # ✅ Use named function instead of lambda
+    elif algorithm == "ida":
+        solve_function = run_ida_star
+    elif algorithm == "hda":
+        solve_function = run_hda_star
+    elif algorithm == "anytime":
+        solve_function = run_anytime
+    elif algorithm == "towers":
+        solve_function = tower_solve
+    elif algorithm == "portfolio":
+        solve_function = None  # Races several solvers in worker processes under its own deadline
     else:
         print(f"Algorithm {algorithm} is not implemented.")
         sys.exit(1)
 
+    # Plug in the requested heuristic
+    if heuristic_name is not None:
+        if algorithm not in HEURISTIC_ALGORITHMS:
+            print(f"Algorithm {algorithm} does not use a heuristic.")
+            sys.exit(1)
+        solve_function = partial(solve_function, heuristic=HEURISTICS[heuristic_name])
+
+    # Reuse a plan of this problem (or of a renamed variant) found by the same algorithm and heuristic;
+    # optimal algorithms also accept the plans of the other optimal ones
+    spec = algorithm if heuristic_name is None else f"{algorithm}:{heuristic_name}"
+    optimal = algorithm in OPTIMAL_ALGORITHMS
+    plan_cache = PlanCache() if use_cache else None
+    cached = plan_cache.get(*plain_states, spec, optimal=optimal) if use_cache else None
+    if cached is not None:
+        solution, cached_algorithm, cached_optimal = cached
+        print(f"Using a cached plan found by {cached_algorithm}{' (optimal)' if cached_optimal else ''}")
+        print("No search was run, so there are no node or time statistics (use --no-cache to solve it again)")
+        print(f"Solution Length: {len(solution)} moves")
+        print(f"Saving to {output_file_path}")
+        save_solution(output_file_path, solution)
+        return
+
+    # Collect search statistics (filled on every exit path, so also available after a timeout)
+    stats = SearchStats()
+    if solve_function is not None:
+        solve_function = partial(solve_function, stats=stats)
+
     # Solve with timeout
     try:
         start_time = time.time()
-        solution, nodes_explored = solve_with_timeout(solve_function, (initial_state, goal_state), timeout=60)
+        if algorithm == "portfolio":
+            solution, nodes_explored = portfolio_solve(initial_state, goal_state, timeout=TIMEOUT)
+        else:
+            solution, nodes_explored = solve_with_timeout(solve_function, (initial_state, goal_state), timeout=TIMEOUT)
         end_time = time.time()
         elapsed_time = end_time - start_time
 
         #  Save the solution to the output file
         if solution:
+            try:
+                validate_plan(*plain_states, solution)
+            except PlanError as e:
+                print(f"Error: The solver returned an invalid plan. {e}")
+                sys.exit(1)
+            if not optimal:
+                optimized = optimize_plan(*plain_states, solution)
+                if len(optimized) < len(solution):
+                    print(f"Post-optimized the plan from {len(solution)} to {len(optimized)} moves")
+                    solution = optimized
             print(f"Solution Length: {len(solution)} moves")
             print(f"Saving to {output_file_path}")
             save_solution(output_file_path, solution)
+            if use_cache:
+                plan_cache.put(*plain_states, solution, spec, optimal=optimal)
             print(f"Nodes Explored: {nodes_explored}")
+            if stats.expanded:
+                print(f"Nodes Generated: {stats.generated} ({stats.duplicates} duplicates)")
             print(f"Time Taken: {elapsed_time:.4f} seconds")
         else:
             print("No solution found.")
 
     except TimeoutException as e:
         print(e)
+        if stats.expanded:
+            print(f"Search statistics at timeout: {stats.summary()}")
         sys.exit(1)
 
 
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from blocks_world import heuristic_search
+from blocks_world.batch_heuristics import deadlock_batch, misplaced_blocks_batch, well_placed_batch
+from blocks_world.generator import random_problem
+from blocks_world.graph import successors, apply_move
+from blocks_world.heuristic_search import a_star_search, deadlock_heuristic, heuristic_batch, \
+    misplaced_blocks_heuristic, well_placed_heuristic
+from blocks_world.state import pack_problem
+
+PAIRS = [
+    (misplaced_blocks_heuristic, misplaced_blocks_batch),
+    (well_placed_heuristic, well_placed_batch),
+    (deadlock_heuristic, deadlock_batch),
+]
+
+
+def random_walk(state, steps, rng):
+    """
+    Return the states visited by a random walk of the given number of moves, starting state included.
+    """
+    states = [state]
+    for _ in range(steps):
+        state = apply_move(state, rng.choice(list(successors(state))))
+        states.append(state)
+    return states
+
+
+@pytest.mark.parametrize("heuristic, batch", PAIRS, ids=lambda value: getattr(value, "__name__", ""))
+@pytest.mark.parametrize("blocks", [2, 5, 12, 30, 60])
+def test_batch_matches_scalar(heuristic, batch, blocks):
+    for seed in range(10):
+        rng = random.Random(seed)
+        initial_state, goal_state = pack_problem(*random_problem(blocks, seed=seed))
+        # Walks from the goal reach the nearly solved states that most tower interactions show up in
+        states = random_walk(initial_state, 50, rng) + random_walk(goal_state, 50, rng)
+        assert batch(states, goal_state) == [heuristic(state, goal_state) for state in states]
+
+
+def test_batch_path_is_forced_below_the_block_threshold(monkeypatch):
+    initial_state, goal_state = pack_problem(*random_problem(7, seed=4))
+    assert heuristic_batch(deadlock_heuristic, goal_state) is None
+    plan, nodes = a_star_search(initial_state, goal_state, deadlock_heuristic)
+
+    calls = []
+
+    def counted_batch(states, goal):
+        calls.append(len(states))
+        return deadlock_batch(states, goal)
+
+    monkeypatch.setattr(heuristic_search, "BATCH_MIN_BLOCKS", 1)
+    monkeypatch.setattr(deadlock_heuristic, "batch", counted_batch)
+    assert heuristic_batch(deadlock_heuristic, goal_state) is counted_batch
+    assert a_star_search(initial_state, goal_state, deadlock_heuristic) == (plan, nodes)
+    assert calls
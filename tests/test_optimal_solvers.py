@@ -0,0 +1,80 @@
+from functools import partial
+
+import pytest
+
+from blocks_world.benchmark import make_solver, OPTIMAL_ALGORITHMS
+from blocks_world.generator import random_problem
+from blocks_world.hda_star import hda_star_search
+from blocks_world.heuristic_search import deadlock_heuristic, HEURISTICS
+from blocks_world.plan import validate_plan
+from blocks_world.state import pack_problem
+from blocks_world.state_graph import build_state_graph, DistanceOracle, load_state_graph
+
+INSTANCES = [(blocks, seed) for blocks in (3, 4, 5, 6) for seed in range(3)]
+
+
+@pytest.fixture(scope="module")
+def graphs():
+    """
+    State graphs by block count, built once for the whole module.
+    """
+    cache = {}
+
+    def graph(initial_state):
+        blocks = len(initial_state.on)
+        if blocks not in cache:
+            cache[blocks] = build_state_graph(initial_state)
+        return cache[blocks]
+    return graph
+
+
+def solver_specs():
+    specs = []
+    for algorithm in OPTIMAL_ALGORITHMS:
+        if algorithm == "hda":
+            continue  # Runs worker processes; tested on its own below
+        if algorithm in ("astar", "ida"):
+            specs.extend(f"{algorithm}:{heuristic}" for heuristic in HEURISTICS)
+        else:
+            specs.append(algorithm)
+    return specs
+
+
+@pytest.mark.parametrize("spec", solver_specs())
+@pytest.mark.parametrize("blocks, seed", INSTANCES)
+def test_plan_length_matches_oracle(graphs, spec, blocks, seed):
+    initial_state, goal_state = random_problem(blocks, seed=seed)
+    packed_initial, packed_goal = pack_problem(initial_state, goal_state)
+    oracle = DistanceOracle(graphs(packed_initial), packed_goal)
+
+    plan, _ = make_solver(spec)(packed_initial, packed_goal)
+    validate_plan(initial_state, goal_state, plan)
+    assert oracle.is_optimal(packed_initial, plan)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_hda_star_matches_oracle(graphs, workers):
+    solve = partial(hda_star_search, heuristic=deadlock_heuristic, workers=workers)
+    for blocks, seed in INSTANCES[-3:]:
+        initial_state, goal_state = random_problem(blocks, seed=seed)
+        packed_initial, packed_goal = pack_problem(initial_state, goal_state)
+        oracle = DistanceOracle(graphs(packed_initial), packed_goal)
+        plan, _ = solve(packed_initial, packed_goal)
+        validate_plan(initial_state, goal_state, plan)
+        assert oracle.is_optimal(packed_initial, plan)
+
+
+@pytest.mark.parametrize("name", sorted(HEURISTICS))
+def test_heuristics_are_admissible_and_consistent(graphs, name):
+    initial_state, goal_state = pack_problem(*random_problem(6, seed=0))
+    oracle = DistanceOracle(graphs(initial_state), goal_state)
+    assert oracle.check_heuristic(HEURISTICS[name]) == (0, 0)
+
+
+def test_saved_graph_is_memory_mapped_back(tmp_path):
+    initial_state, goal_state = pack_problem(*random_problem(5, seed=0))
+    built = load_state_graph(initial_state, directory=str(tmp_path))
+    loaded = load_state_graph(initial_state, directory=str(tmp_path))
+    assert len(loaded) == len(built) == 501
+    assert loaded.edge_count() == built.edge_count()
+    assert list(loaded.distances(loaded.find(goal_state.on))) == list(built.distances(built.find(goal_state.on)))
@@ -0,0 +1,62 @@
+import pytest
+
+from blocks_world.dfs import dfs_solve
+from blocks_world.generator import random_problem
+from blocks_world.plan import format_move, merge_moves, optimize_plan, parse_move, PlanError, remove_cycles, \
+    validate_plan
+from blocks_world.state import pack_problem, TABLE
+from blocks_world.towers import tower_plan
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_tower_plans_validate(seed):
+    initial_state, goal_state = random_problem(30, seed=seed)
+    validate_plan(initial_state, goal_state, tower_plan(initial_state, goal_state))
+
+
+def test_move_round_trip():
+    assert parse_move(format_move("A", TABLE, "B")) == ("A", TABLE, "B")
+    with pytest.raises(PlanError):
+        parse_move("Move A to B")
+
+
+@pytest.mark.parametrize("plan, message", [
+    (["Move B1 from TABLE to TABLE"], "illegal"),
+    (["Move Z from TABLE to B1"], "illegal"),
+    ([], "does not reach the goal"),
+])
+def test_invalid_plans_are_rejected(plan, message):
+    initial_state, goal_state = random_problem(4, seed=3)
+    with pytest.raises(PlanError, match=message):
+        validate_plan(initial_state, goal_state, plan)
+
+
+def test_covered_block_cannot_move():
+    initial_state, goal_state = random_problem(5, seed=0)
+    covered = next(iter(initial_state.on.values()))
+    with pytest.raises(PlanError, match="not clear"):
+        validate_plan(initial_state, goal_state, [format_move(covered, TABLE, TABLE)])
+
+
+def test_remove_cycles_drops_a_round_trip():
+    initial_state, _ = random_problem(5, seed=1)
+    block = next(iter(initial_state.clear - set(initial_state.onTable)))
+    below = initial_state.on[block]
+    detour = [(block, below, TABLE), (block, TABLE, below)]
+    assert remove_cycles(initial_state, detour) == []
+
+
+def test_merge_moves():
+    assert merge_moves([("A", TABLE, "B"), ("A", "B", "C")]) == [("A", TABLE, "C")]
+    assert merge_moves([("A", "C", TABLE), ("A", TABLE, "C")]) == []
+    blocked = [("A", "C", TABLE), ("D", TABLE, "C"), ("A", TABLE, "B")]  # C is covered before A's second move
+    assert merge_moves(blocked) == blocked
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_optimize_plan_keeps_plans_valid(seed):
+    initial_state, goal_state = random_problem(6, seed=seed)
+    plan, _ = dfs_solve(*pack_problem(initial_state, goal_state))
+    optimized = optimize_plan(initial_state, goal_state, plan)
+    assert len(optimized) <= len(plan)
+    validate_plan(initial_state, goal_state, optimized)
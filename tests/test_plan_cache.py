@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from blocks_world.bfs import bfs_solve
+from blocks_world.generator import random_problem, towers_to_state
+from blocks_world.plan import validate_plan
+from blocks_world.plan_cache import CanonicalProblem, PlanCache
+from blocks_world.state import pack_problem
+
+
+def towers(state):
+    """
+    Return the towers (bottom-up lists of blocks) of a BlockWorldState.
+    """
+    above = {below: block for block, below in state.on.items()}
+    result = []
+    for bottom in state.onTable:
+        tower = [bottom]
+        while tower[-1] in above:
+            tower.append(above[tower[-1]])
+        result.append(tower)
+    return result
+
+
+def renamed(state, names):
+    return towers_to_state([[names[block] for block in tower] for tower in towers(state)])
+
+
+def solve(initial_state, goal_state):
+    plan, _ = bfs_solve(*pack_problem(initial_state, goal_state))
+    return plan
+
+
+@pytest.fixture
+def cache(tmp_path):
+    plan_cache = PlanCache(path=str(tmp_path / "plans.sqlite"))
+    yield plan_cache
+    plan_cache.close()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fingerprint_is_invariant_to_renaming(seed):
+    initial_state, goal_state = random_problem(7, seed=seed)
+    rng = random.Random(seed)
+    targets = [f"X{rng.randrange(10 ** 6)}-{number}" for number in range(7)]
+    rng.shuffle(targets)
+    names = dict(zip(sorted(initial_state.onTable | set(initial_state.on)), targets))
+
+    original = CanonicalProblem(initial_state, goal_state)
+    variant = CanonicalProblem(renamed(initial_state, names), renamed(goal_state, names))
+    assert original.fingerprint == variant.fingerprint
+    # Symmetric blocks may be numbered differently, so the translated plan is checked by replay
+    plan = solve(initial_state, goal_state)
+    translated = variant.decode_plan(original.encode_plan(plan))
+    assert len(translated) == len(plan)
+    validate_plan(renamed(initial_state, names), renamed(goal_state, names), translated)
+
+
+def test_renamed_problem_reuses_plan(cache):
+    initial_state, goal_state = random_problem(6, seed=1)
+    plan = solve(initial_state, goal_state)
+    cache.put(initial_state, goal_state, plan, "bfs", optimal=True)
+
+    names = {f"B{number}": f"Z{7 - number}" for number in range(1, 7)}
+    renamed_initial, renamed_goal = renamed(initial_state, names), renamed(goal_state, names)
+    cached = cache.get(renamed_initial, renamed_goal, "astar:deadlock", optimal=True)
+    assert cached is not None
+    cached_plan, algorithm, optimal = cached
+    assert (algorithm, optimal) == ("bfs", True)
+    assert len(cached_plan) == len(plan)
+    validate_plan(renamed_initial, renamed_goal, cached_plan)
+
+
+def test_plans_are_matched_to_the_algorithm(cache):
+    initial_state, goal_state = random_problem(6, seed=2)
+    plan = solve(initial_state, goal_state)
+    cache.put(initial_state, goal_state, plan, "bfs", optimal=True)
+
+    assert cache.get(initial_state, goal_state, "dfs") is None
+    assert cache.get(initial_state, goal_state, "best:deadlock") is None
+    assert cache.get(initial_state, goal_state, "ida:deadlock", optimal=True)[0] == plan
+
+    _, block, _, source, _, target = plan[0].split()
+    detour = [plan[0], f"Move {block} from {target} to {source}"] + plan  # A longer, non-optimal plan
+    cache.put(initial_state, goal_state, detour, "dfs")
+    assert cache.get(initial_state, goal_state, "dfs")[0] == detour
+    assert cache.get(initial_state, goal_state, "bfs", optimal=True)[0] == plan
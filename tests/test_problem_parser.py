@@ -0,0 +1,69 @@
+import glob
+import os
+
+import pytest
+
+from blocks_world.generator import random_problem, to_pddl, write_problems
+from blocks_world.problem_parser import build_problem, load_problem, load_problems, ProblemError, read_expressions, \
+    tokenize
+
+
+PROBLEMS_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "data", "problems")
+
+
+def parse(text):
+    return [build_problem(expression) for expression in read_expressions(tokenize(text.splitlines()))]
+
+
+@pytest.mark.parametrize("blocks", [1, 2, 5, 12, 40, 300])
+def test_generated_problem_round_trip(blocks):
+    initial_state, goal_state = random_problem(blocks, seed=blocks)
+    [problem] = parse(to_pddl("ROUND-TRIP", initial_state, goal_state))
+    assert problem.name == "ROUND-TRIP"
+    parsed_initial, parsed_goal = problem.states()
+    assert parsed_initial.on == initial_state.on
+    assert parsed_initial.onTable == initial_state.onTable
+    assert parsed_initial.clear == initial_state.clear
+    assert parsed_goal.on == goal_state.on
+
+
+def test_concatenated_problems(tmp_path):
+    [path] = write_problems(str(tmp_path), sizes=[3, 4], count=2, concatenate=True)
+    assert [problem.name for problem in load_problems(path)] == \
+        ["RANDOM-3-0", "RANDOM-3-1", "RANDOM-4-0", "RANDOM-4-1"]
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(PROBLEMS_DIRECTORY, "*.pddl"))))
+def test_shipped_problems_pack(path):
+    problem = load_problem(path)
+    initial_state, goal_state = problem.pack()
+    assert initial_state.unpack().on == problem.states()[0].on
+    assert goal_state.unpack().on == problem.states()[1].on
+
+
+@pytest.mark.parametrize("text", [
+    "(define (problem p)",
+    "(define (problem p)))",
+    "(define ((x)) (:init (ontable a)) (:goal (and)))",
+    "(define (problem (x)) (:init (ontable a)) (:goal (and)))",
+    "(define (problem p) (:objects a) (:init (ontable a) (on b a)) (:goal (and)))",
+    "(define (problem p) (:init (on a b) (on b a)) (:goal (and)))",
+    "(define (problem p) (:init (ontable a) (ontable b)) (:goal (and (on a b) (on b a))))",
+    "(define (problem p) (:init (ontable a) (ontable b) (on c a) (on d a)) (:goal (and)))",
+    "(define (problem p) (:init (ontable a)))",
+])
+def test_malformed_problems_raise_problem_error(text):
+    with pytest.raises(ProblemError):
+        parse(text)
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.pddl"
+    path.write_text("\n")
+    with pytest.raises(ProblemError):
+        load_problem(str(path))
+
+
+def test_self_support_is_reported():
+    with pytest.raises(ProblemError, match="sits on itself"):
+        parse("(define (problem p) (:init (on a a)) (:goal (and)))")